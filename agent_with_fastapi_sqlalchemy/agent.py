@@ -1,16 +1,18 @@
+import os
+
 from langchain_community.llms.ollama import Ollama
 from langchain_classic.agents import initialize_agent, AgentType, create_react_agent, AgentExecutor
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from tools import calculator, company_info
-from db_tools import get_user_by_email_tool
-
-from langchain_classic import hub
+from db_tools import get_user_by_email_tool, get_users_by_emails
+from prompt_loader import load_prompt
 
 model = Ollama(model="phi3", temperature=0)
-tools = [calculator, company_info, get_user_by_email_tool]
+tools = [calculator, company_info, get_user_by_email_tool, get_users_by_emails]
 
 
-prompt = hub.pull("hwchase17/react")
+# vendored copy of hwchase17/react (hash-checked); no hub round-trip at import
+prompt = load_prompt("hwchase17/react")
 
 
 # - For production:
@@ -36,16 +38,28 @@ prompt = hub.pull("hwchase17/react")
 # )
 
 
-# tool calling agent
-agent = create_react_agent(
-    llm=model,
-    tools=tools,
-    prompt=prompt
-)
+# Budgets per agent run: stop after this many ReAct steps or this many seconds
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "5"))
+AGENT_MAX_EXECUTION_TIME = float(os.getenv("AGENT_MAX_EXECUTION_TIME", "60"))
+
+
+def build_agent_executor(llm, tools=tools, prompt=prompt):
+    # tool calling agent
+    agent = create_react_agent(
+        llm=llm,
+        tools=tools,
+        prompt=prompt
+    )
+    # verbose is off: pass callbacks per request instead of printing every run to the console
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=False,
+        max_iterations=AGENT_MAX_ITERATIONS,
+        max_execution_time=AGENT_MAX_EXECUTION_TIME,
+    )
+
 
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    verbose=True
-)
+# One shared executor: it holds no per-run state, so concurrent requests can use it
+agent_executor = build_agent_executor(model)
 
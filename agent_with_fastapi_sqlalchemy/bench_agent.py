@@ -0,0 +1,79 @@
+"""
+Concurrency benchmark for /agent/invoke with a scripted fake LLM.
+
+The fake LLM plays a two-step ReAct run (one company_info call, then a final
+answer). Each LLM call has a fixed latency: time.sleep when called
+synchronously, asyncio.sleep when awaited.
+
+Old path: blocking agent_executor.invoke with verbose=True inside the async handler.
+New path: main.invoke_agent (ainvoke, concurrency limiter, per-request callbacks).
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_agent.py --requests 8 --delay 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_classic.agents import AgentExecutor, create_react_agent
+from langchain_core.language_models.llms import LLM
+
+import main
+from agent import build_agent_executor, prompt, tools
+
+
+class ScriptedReActLLM(LLM):
+    delay: float = 0.2
+
+    @property
+    def _llm_type(self):
+        return "scripted-react"
+
+    def _script(self, prompt_text: str) -> str:
+        scratchpad = prompt_text.rsplit("Question:", 1)[-1]
+        if "Observation:" in scratchpad:
+            return " I now know the final answer\nFinal Answer: Tata Group is an Indian multinational conglomerate."
+        return " I should look up the company\nAction: company_info\nAction Input: tata"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        return self._script(prompt)
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._script(prompt)
+
+
+async def measure(label: str, make_call, requests: int):
+    start = time.perf_counter()
+    results = await asyncio.gather(*[make_call(f"Tell me about tata ({i})") for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:>4}: {requests} runs in {elapsed:.3f}s -> {requests / elapsed:.1f} runs/s")
+    return results
+
+
+async def run(requests: int, delay: float):
+    llm = ScriptedReActLLM(delay=delay)
+
+    old_executor = AgentExecutor(agent=create_react_agent(llm=llm, tools=tools, prompt=prompt), tools=tools, verbose=True)
+
+    async def old_invoke(query):
+        return {"response": old_executor.invoke({"input": query})["output"]}
+
+    main.agent_executor = build_agent_executor(llm)
+
+    async def new_invoke(query):
+        return await main.invoke_agent(main.AgentRequest(query=query))
+
+    await measure("old", old_invoke, requests)
+    results = await measure("new", new_invoke, requests)
+    print("sample:", results[0])
+    print(f"(new path runs at most {main.MAX_CONCURRENT_AGENT_RUNS} agents at once)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="fake LLM latency per call in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.delay))
@@ -0,0 +1,46 @@
+"""
+Cold-start benchmark for the agent prompt.
+
+Each measurement runs in a fresh Python process, so import costs are included:
+  cached : prompt_loader.load_prompt("hwchase17/react") from ./prompts
+  hub    : langchain_classic.hub.pull("hwchase17/react") (needs network)
+  agent  : `import agent` as a whole (uses the cached prompt)
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_import.py --runs 3
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+SNIPPETS = {
+    "cached": "from prompt_loader import load_prompt; load_prompt('hwchase17/react')",
+    "hub": "from langchain_classic import hub; hub.pull('hwchase17/react')",
+    "agent": "import agent",
+}
+
+
+def time_snippet(code: str) -> float:
+    timer = f"import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+    out = subprocess.run([sys.executable, "-c", timer], cwd=HERE, capture_output=True, text=True)
+    if out.returncode != 0:
+        errors = [line for line in out.stderr.splitlines() if "Error" in line] or out.stderr.splitlines() or ["unknown error"]
+        raise RuntimeError(errors[-1].strip())
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    for label, code in SNIPPETS.items():
+        try:
+            times = [time_snippet(code) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{label:>6}: failed ({e})")
+            continue
+        print(f"{label:>6}: median {statistics.median(times):.3f}s over {args.runs} runs")
@@ -1,10 +1,30 @@
+import importlib.util
+import os
+from contextlib import asynccontextmanager, contextmanager
+
 from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+
+# Connections are pooled and reused across tool calls instead of opened per query
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
-DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+)
 
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+# one session per thread (agent tools run on executor threads)
+ScopedSession = scoped_session(SessionLocal)
 
 Base = declarative_base()
 
@@ -14,16 +34,53 @@ class User(Base):
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
 
+@contextmanager
+def session_scope():
+    """Thread-scoped session; commits on success, rolls back on error, returns the connection to the pool."""
+    session = ScopedSession()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        ScopedSession.remove()
+
+# Async engine variant, created on first use (needs an async driver such as aiosqlite)
+_async_sessionmaker = None
+
+def async_engine_available() -> bool:
+    # SQLAlchemy's asyncio layer needs greenlet in addition to the async driver itself
+    driver = make_url(ASYNC_DATABASE_URL).get_dialect().driver
+    return all(importlib.util.find_spec(mod) is not None for mod in (driver, "greenlet"))
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+        _async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
+@asynccontextmanager
+async def async_session_scope():
+    async with get_async_sessionmaker()() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
 def init_db():
     Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    # Add a sample user
-    if not db.query(User).first():
-        db.add_all([
-            User(name="Alice", email="alice@example.com"),
-            User(name="Bob", email="bob@example.com"),
-            User(name="Charlie", email="charlie@example.com")
-        ])
-        db.commit()
-
-    db.close()
\ No newline at end of file
+    with session_scope() as db:
+        # Add a sample user
+        if not db.query(User).first():
+            db.add_all([
+                User(name="Alice", email="alice@example.com"),
+                User(name="Bob", email="bob@example.com"),
+                User(name="Charlie", email="charlie@example.com")
+            ])
@@ -1,13 +1,95 @@
+import os
+import re
+
 from langchain_community.tools import tool
-from database import SessionLocal, User
+from langchain_core.tools import StructuredTool
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from database import User, session_scope, async_session_scope, async_engine_available
+
+from common.tool_cache import invalidate, tool_cache
+
+# User lookups are cached briefly and dropped once a write to the users table commits
+USER_TOOL_CACHE_TTL = float(os.getenv("USER_TOOL_CACHE_TTL", "60"))
+USER_TOOL_CACHE_SIZE = int(os.getenv("USER_TOOL_CACHE_SIZE", "512"))
+_USERS_CHANGED = "users_changed"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_user_writes(session, flush_context):
+    # ORM writes only; bulk query.update()/delete() bypass the unit of work.
+    # new/dirty/deleted still hold the pre-flush state here.
+    if any(isinstance(obj, User) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_USERS_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_user_tools(session):
+    # only after commit: invalidating at flush time lets a concurrent lookup re-cache the old row
+    if session.info.pop(_USERS_CHANGED, False):
+        invalidate("users")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_writes(session):
+    session.info.pop(_USERS_CHANGED, None)
+
+
+def _format_user(user) -> str:
+    return f"User found: ID={user.id}, Name={user.name}, Email={user.email}"
+
+
+def _parse_emails(emails: str) -> list[str]:
+    return list(dict.fromkeys(e.strip() for e in re.split(r"[,;\s]+", emails) if e.strip()))
+
+
+def _format_users(wanted: list[str], users) -> str:
+    by_email = {user.email: user for user in users}
+    return "\n".join(
+        _format_user(by_email[email]) if email in by_email else f"User not found: {email}" for email in wanted
+    )
+
 
 @tool
+@tool_cache(ttl_seconds=USER_TOOL_CACHE_TTL, max_entries=USER_TOOL_CACHE_SIZE, tags=("users",))
 def get_user_by_email_tool(email: str) -> str:
     """Tool that retrieves a user by email from the database."""
-    db = SessionLocal()
-    user = db.query(User).filter(User.email == email).first()
-    db.close()
+    with session_scope() as db:
+        user = db.query(User).filter(User.email == email).first()
     if user:
-        return str(f"User found: ID={user.id}, Name={user.name}, Email={user.email}")
+        return _format_user(user)
     else:
-        return "User not found."
\ No newline at end of file
+        return "User not found."
+
+
+@tool_cache(ttl_seconds=USER_TOOL_CACHE_TTL, max_entries=USER_TOOL_CACHE_SIZE, tags=("users",))
+def _get_users_by_emails(emails: str) -> str:
+    wanted = _parse_emails(emails)
+    if not wanted:
+        return "No emails given."
+    with session_scope() as db:
+        users = db.query(User).filter(User.email.in_(wanted)).all()
+    return _format_users(wanted, users)
+
+
+@tool_cache(ttl_seconds=USER_TOOL_CACHE_TTL, max_entries=USER_TOOL_CACHE_SIZE, tags=("users",))
+async def _aget_users_by_emails(emails: str) -> str:
+    wanted = _parse_emails(emails)
+    if not wanted:
+        return "No emails given."
+    async with async_session_scope() as db:
+        users = (await db.execute(select(User).where(User.email.in_(wanted)))).scalars().all()
+    return _format_users(wanted, users)
+
+
+# Batched lookup: one IN query for any number of emails instead of one round-trip each.
+# Async agent runs use the async engine when its driver is installed.
+get_users_by_emails = StructuredTool.from_function(
+    func=_get_users_by_emails,
+    coroutine=_aget_users_by_emails if async_engine_available() else None,
+    name="get_users_by_emails",
+    description=(
+        "Tool that retrieves several users from the database in one query. "
+        "Input: comma-separated email addresses."
+    ),
+)
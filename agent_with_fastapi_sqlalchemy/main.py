@@ -1,5 +1,9 @@
+import asyncio
+import os
+
 from fastapi import FastAPI
 from pydantic import BaseModel
+from langchain_core.callbacks import AsyncCallbackHandler
 from agent import agent_executor
 from database import init_db
 
@@ -7,12 +11,33 @@ app = FastAPI()
 
 init_db() # initialize DB on startup
 
+# At most this many agent runs at once; further requests wait for a free slot
+MAX_CONCURRENT_AGENT_RUNS = int(os.getenv("MAX_CONCURRENT_AGENT_RUNS", "4"))
+_agent_slots = asyncio.Semaphore(MAX_CONCURRENT_AGENT_RUNS)
+
 class AgentRequest(BaseModel):
     query: str
+    debug: bool = False  # include this run's tool calls in the response
+
+class StepRecorder(AsyncCallbackHandler):
+    """Per-request callback: records the tool calls of one agent run."""
+
+    def __init__(self):
+        self.steps = []
+
+    async def on_agent_action(self, action, **kwargs):
+        self.steps.append({"tool": action.tool, "tool_input": action.tool_input})
+
+    async def on_tool_end(self, output, **kwargs):
+        if self.steps:
+            self.steps[-1]["observation"] = str(output)
 
 @app.post("/agent/invoke")
 async def invoke_agent(request: AgentRequest):
-    # Here you would integrate the agent logic
-    response = agent_executor.invoke({"input": request.query})
-    print(response)
-    return {"response": response["output"]}
\ No newline at end of file
+    recorder = StepRecorder()
+    async with _agent_slots:
+        response = await agent_executor.ainvoke({"input": request.query}, config={"callbacks": [recorder]})
+    result = {"response": response["output"]}
+    if request.debug:
+        result["steps"] = recorder.steps
+    return result
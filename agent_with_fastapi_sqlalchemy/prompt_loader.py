@@ -0,0 +1,72 @@
+"""
+Load agent prompts from disk instead of the LangChain hub.
+
+Prompts live in ./prompts as plain template files, listed in prompts/manifest.json
+with their sha256. Loading checks the hash, so a corrupted or hand-edited file is
+caught instead of silently changing agent behaviour. The hub is only contacted
+when explicitly allowed (allow_hub=True or PROMPT_HUB_FALLBACK=true). The pulled
+template is then written to the cache, so the next start is offline again.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from langchain_core.prompts import PromptTemplate
+
+PROMPTS_DIR = Path(os.getenv("PROMPTS_DIR", Path(__file__).resolve().parent / "prompts"))
+MANIFEST_PATH = PROMPTS_DIR / "manifest.json"
+HUB_FALLBACK = os.getenv("PROMPT_HUB_FALLBACK", "false").lower() in ("1", "true")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _read_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def _pull_from_hub(name: str) -> str:
+    # imported lazily: the hub client is only needed on a cache miss
+    from langchain_classic import hub
+
+    prompt = hub.pull(name)
+    template = getattr(prompt, "template", None)
+    if template is None:
+        raise ValueError(f"Prompt {name!r} from the hub is not a single-template prompt and cannot be cached")
+
+    PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
+    file_name = name.replace("/", "__") + ".txt"
+    (PROMPTS_DIR / file_name).write_text(template, encoding="utf-8")
+    manifest = _read_manifest()
+    manifest[name] = {"file": file_name, "sha256": _sha256(template)}
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return template
+
+
+def load_prompt(name: str, allow_hub: bool = None, refresh: bool = False) -> PromptTemplate:
+    """
+    Return the prompt `name` (e.g. "hwchase17/react") from the on-disk cache.
+    With refresh=True (and the hub allowed) the cached copy is replaced by a fresh pull.
+    """
+    allow_hub = HUB_FALLBACK if allow_hub is None else allow_hub
+    entry = _read_manifest().get(name)
+
+    if entry is not None and not refresh:
+        path = PROMPTS_DIR / entry["file"]
+        if path.exists():
+            template = path.read_text(encoding="utf-8")
+            if _sha256(template) == entry["sha256"]:
+                return PromptTemplate.from_template(template)
+            if not allow_hub:
+                raise ValueError(f"Cached prompt {path} does not match its sha256 in {MANIFEST_PATH}")
+
+    if not allow_hub:
+        raise FileNotFoundError(
+            f"Prompt {name!r} is not cached in {PROMPTS_DIR}; "
+            "set PROMPT_HUB_FALLBACK=true (or pass allow_hub=True) to pull it from the hub once"
+        )
+    return PromptTemplate.from_template(_pull_from_hub(name))
@@ -1,15 +1,24 @@
 from langchain_community.tools import tool
 
+from common.safe_eval import ExpressionError, safe_eval
+from common.tool_cache import tool_cache
+
 @tool
+@tool_cache(ttl_seconds=3600, max_entries=1024)  # pure function: results never go stale
 def calculator(expression: str) -> str:
     """Evaluate a math expression"""
-    return str(eval(expression))
+    try:
+        return str(safe_eval(expression))
+    except (ExpressionError, ZeroDivisionError) as e:
+        # hand the error back as the observation so the agent can correct itself
+        return f"Could not evaluate {expression!r}: {e}"
 
 @tool
+@tool_cache(ttl_seconds=3600, max_entries=256)
 def company_info(name: str) -> str:
     """Get company info"""
     data = {
         "tata": "Tata Group is an Indian multinational conglomerate.",
         "google": "Google is a global technology company."
     }
-    return data.get(name.lower(), "Company not found")
\ No newline at end of file
+    return data.get(name.lower(), "Company not found")
@@ -2,12 +2,18 @@ from langchain_community.llms.ollama import Ollama
 from langchain_classic.tools import tool
 from langchain_classic.agents import initialize_agent, AgentType
 
+from common.safe_eval import ExpressionError, safe_eval
+
 model = Ollama(model="phi3", temperature=0)
 
 @tool
 def calculator(expression: str) -> str:
     """Evaluate a math expression"""
-    return str(eval(expression))
+    try:
+        return str(safe_eval(expression))
+    except (ExpressionError, ZeroDivisionError) as e:
+        # hand the error back as the observation so the agent can correct itself
+        return f"Could not evaluate {expression!r}: {e}"
 
 
 @tool
@@ -0,0 +1,202 @@
+"""
+Persistent embedding cache shared by the RAG examples.
+
+Vectors are stored in a SQLite file keyed by (embedding model, sha256 of the text),
+with a small in-process LRU in front of it. Wrap any LangChain embeddings object:
+
+    embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+
+and text that was embedded before (in this process or a previous run) is never sent
+to the embedding model again. Query vectors (one per distinct user question) are
+kept in a bounded in-process LRU only, so a long-running service does not grow the
+SQLite file with every question it is asked.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db")
+DEFAULT_LRU_SIZE = 4096
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed vector store for embeddings with an LRU in front of it."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, lru_size: int = DEFAULT_LRU_SIZE):
+        self.path = path
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            missing = []
+            for h in hashes:
+                vector = self._lru.get((model, h))
+                if vector is None:
+                    missing.append(h)
+                else:
+                    self._lru.move_to_end((model, h))
+                    found[h] = vector
+            # SQLite limits the number of bound parameters, so query in slices
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(part))})",
+                    [model, *part],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = array("f", blob).tolist()
+                    self._remember((model, h), vector)
+                    found[h] = vector
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                [(model, h, array("f", vector).tobytes()) for h, vector in items.items()],
+            )
+            self._conn.commit()
+            for h, vector in items.items():
+                self._remember((model, h), list(vector))
+
+
+class MemoryEmbeddingCache:
+    """In-process LRU with the EmbeddingCache interface, for vectors not worth keeping on disk."""
+
+    def __init__(self, lru_size: int = DEFAULT_LRU_SIZE):
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for h in hashes:
+                vector = self._lru.get((model, h))
+                if vector is not None:
+                    self._lru.move_to_end((model, h))
+                    found[h] = vector
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]):
+        with self._lock:
+            for h, vector in items.items():
+                self._lru[(model, h)] = list(vector)
+                self._lru.move_to_end((model, h))
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+
+_shared_caches = {}
+
+
+def get_cache(path: str = DEFAULT_CACHE_PATH) -> EmbeddingCache:
+    """Return one EmbeddingCache per file so every pipeline in a process shares it."""
+    if path not in _shared_caches:
+        _shared_caches[path] = EmbeddingCache(path)
+    return _shared_caches[path]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only calls the underlying model for text it has not seen.
+    Documents and queries are cached under separate keys because some models
+    (e.g. OllamaEmbeddings) prefix them with different instructions. Document vectors
+    go to the persistent `cache`; query vectors only to the in-process `query_cache`.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache = None, model_name: str = None,
+                 query_cache: MemoryEmbeddingCache = None):
+        self.embeddings = embeddings
+        self.cache = cache or get_cache()
+        self.query_cache = query_cache or MemoryEmbeddingCache()
+        self.model_name = model_name or getattr(embeddings, "model", None) or type(embeddings).__name__
+
+    def _lookup(self, kind: str, texts: list[str]):
+        """Return (cache, model key, hashes, cached vectors, {hash: text} still to embed)."""
+        cache = self.query_cache if kind == "query" else self.cache
+        model = f"{self.model_name}:{kind}"
+        hashes = [content_hash(text) for text in texts]
+        found = cache.get_many(model, hashes)
+
+        # embed each unseen text once, even if it repeats in this call
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in found:
+                missing.setdefault(h, text)
+        return cache, model, hashes, found, missing
+
+    def _store(self, cache, model, hashes, found, missing, vectors):
+        if missing:
+            new_items = dict(zip(missing.keys(), vectors))
+            cache.put_many(model, new_items)
+            found.update(new_items)
+        return [found[h] for h in hashes]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        cache, model, hashes, found, missing = self._lookup("document", texts)
+        vectors = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._store(cache, model, hashes, found, missing, vectors)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        # SQLite reads and commits block, and share a lock with ingest threads: keep them off the event loop
+        cache, model, hashes, found, missing = await asyncio.to_thread(self._lookup, "document", texts)
+        vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else []
+        return await asyncio.to_thread(self._store, cache, model, hashes, found, missing, vectors)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_queries([text]))[0]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries (query-side instructions) in one call when the model supports it."""
+        cache, model, hashes, found, missing = self._lookup("query", texts)
+        vectors = []
+        if missing:
+            if hasattr(self.embeddings, "embed_queries"):
+                vectors = self.embeddings.embed_queries(list(missing.values()))
+            else:
+                vectors = [self.embeddings.embed_query(text) for text in missing.values()]
+        return self._store(cache, model, hashes, found, missing, vectors)
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        # the query cache is in-process only, so this never waits on SQLite or the ingest threads
+        cache, model, hashes, found, missing = self._lookup("query", texts)
+        vectors = []
+        if missing:
+            if hasattr(self.embeddings, "aembed_queries"):
+                vectors = await self.embeddings.aembed_queries(list(missing.values()))
+            else:
+                vectors = await asyncio.gather(*[self.embeddings.aembed_query(text) for text in missing.values()])
+        return self._store(cache, model, hashes, found, missing, vectors)
@@ -0,0 +1,75 @@
+"""
+Token-budgeted sliding window over a conversation.
+
+Each item's token count is computed once, when it is appended, and a running
+total is kept. Appending drops the oldest items until the total fits the budget,
+but the newest item is always kept, even if it alone exceeds the budget.
+Each turn therefore costs O(new message), not O(whole history).
+
+    window = TokenWindow(max_tokens=1024)
+    evicted = window.append(message, text=message.content)
+"""
+from collections import deque
+from typing import Callable, Optional
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap tokenizer-free estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class TokenWindow:
+    def __init__(
+        self,
+        max_tokens: int = 1024,
+        max_items: Optional[int] = None,
+        count_tokens: Callable[[str], int] = approx_token_count,
+    ):
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.count_tokens = count_tokens
+        self.total_tokens = 0
+        self._items = deque()  # (item, tokens), oldest first
+
+    def append(self, item, text: str = None) -> list:
+        """Add an item (counted from `text`, or str(item)) and return the items evicted to fit."""
+        tokens = self.count_tokens(text if text is not None else str(item))
+        self._items.append((item, tokens))
+        self.total_tokens += tokens
+        return self._trim()
+
+    def extend_last(self, text: str) -> list:
+        """Count `text` towards the newest item (e.g. the reply that completes a turn); return evicted items."""
+        item, tokens = self._items[-1]
+        added = self.count_tokens(text)
+        self._items[-1] = (item, tokens + added)
+        self.total_tokens += added
+        return self._trim()
+
+    def set_budget(self, max_tokens: int) -> list:
+        self.max_tokens = max_tokens
+        return self._trim()
+
+    def _trim(self) -> list:
+        evicted = []
+        while len(self._items) > 1 and (
+            self.total_tokens > self.max_tokens
+            or (self.max_items is not None and len(self._items) > self.max_items)
+        ):
+            item, tokens = self._items.popleft()
+            self.total_tokens -= tokens
+            evicted.append(item)
+        return evicted
+
+    def items(self) -> list:
+        return [item for item, _ in self._items]
+
+    def clear(self):
+        self._items.clear()
+        self.total_tokens = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return (item for item, _ in self._items)
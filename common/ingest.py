@@ -0,0 +1,342 @@
+"""
+Ingestion stage: embed chunks concurrently and write them to Chroma in bulk.
+
+OllamaEmbeddings sends one HTTP request per text, so embedding a corpus one chunk
+after another is bound by round-trip latency. Here chunks are sharded into batches
+that are embedded on a bounded thread pool. At most `max_pending` batches are in
+flight (backpressure: the producer waits for the oldest batch instead of queueing
+the whole corpus). Vectors are then upserted straight into the Chroma collection,
+so the store does not embed them a second time.
+
+    upsert_documents(vector_store, documents, ids, embeddings, max_workers=4)
+
+For corpora that do not fit in memory, ingest_stream() runs the same stage over a
+generator pipeline: files are read lazily in blocks, split as a stream, embedded
+and upserted batch by batch. At most about `max_pending * batch_size` chunks are
+held at once, whatever the corpus size. Progress is written to an optional
+checkpoint file after every upsert, so an interrupted run resumes where it stopped:
+
+    ingest_stream(vector_store, iter_text_files(["dump/"]), embeddings, splitter,
+                  checkpoint_path="ingest.checkpoint.json")
+
+Run as a script to index files into a persistent Chroma collection:
+
+    python -m common.ingest dump/ --collection corpus --checkpoint ingest.checkpoint.json
+"""
+import hashlib
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_WORKERS = 4
+WRITE_BATCH_SIZE = 512
+BLOCK_CHARS = 1 << 20  # files are read and split ~1 MB at a time
+TEXT_PATTERNS = ("*.txt", "*.md")
+
+
+def embed_batches(
+    embeddings: Embeddings,
+    batches: Iterable[list],
+    max_workers: int = DEFAULT_WORKERS,
+    max_pending: int = None,
+    texts_of=lambda batch: [doc.page_content for doc in batch],
+) -> Iterator[tuple[list, list[list[float]]]]:
+    """
+    Embed `batches` on a pool of `max_workers` threads and yield (batch, vectors) in
+    input order, where vectors line up with `texts_of(batch)`. `batches` is consumed
+    lazily; at most `max_pending` (default 2 * max_workers) batches are submitted but
+    not yet yielded.
+    """
+    max_pending = max_pending or 2 * max_workers
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed") as pool:
+        for batch in batches:
+            if len(pending) >= max_pending:
+                done_batch, future = pending.popleft()
+                yield done_batch, future.result()
+            pending.append((batch, pool.submit(_embed, embeddings, texts_of(batch))))
+        while pending:
+            done_batch, future = pending.popleft()
+            yield done_batch, future.result()
+
+
+def _embed(embeddings: Embeddings, texts: list[str]) -> list[list[float]]:
+    return embeddings.embed_documents(texts) if texts else []
+
+
+def shard(items: Sequence, batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = DEFAULT_WORKERS) -> list[list]:
+    """Split items into batches of at most batch_size, small enough to keep every worker busy."""
+    if not items:
+        return []
+    size = max(1, min(batch_size, math.ceil(len(items) / max_workers)))
+    return [list(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def _upsert(collection, rows: list[tuple[str, Document, list[float]]]):
+    metadatas = [doc.metadata or None for _, doc, _ in rows]
+    collection.upsert(
+        ids=[chunk_id for chunk_id, _, _ in rows],
+        documents=[doc.page_content for _, doc, _ in rows],
+        embeddings=[vector for _, _, vector in rows],
+        metadatas=metadatas if any(metadatas) else None,
+    )
+
+
+def upsert_documents(
+    vector_store,
+    documents: Sequence[Document],
+    ids: Sequence[str],
+    embeddings: Embeddings,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = DEFAULT_WORKERS,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+) -> int:
+    """
+    Embed `documents` concurrently and upsert them into a LangChain Chroma store under
+    `ids`. Writes are grouped into bulk upserts of up to `write_batch_size` rows.
+    Returns the number of documents written.
+    """
+    collection = vector_store._collection
+    rows = []
+    written = 0
+    for batch, vectors in embed_batches(embeddings, shard(list(zip(ids, documents)), batch_size, max_workers),
+                                        max_workers=max_workers,
+                                        texts_of=lambda batch: [doc.page_content for _, doc in batch]):
+        rows.extend((chunk_id, doc, vector) for (chunk_id, doc), vector in zip(batch, vectors))
+        if len(rows) >= write_batch_size:
+            _upsert(collection, rows)
+            written += len(rows)
+            rows = []
+    if rows:
+        _upsert(collection, rows)
+        written += len(rows)
+    return written
+
+
+# -------------------------
+# Streaming ingestion
+# -------------------------
+def content_id(source: str, index: int, text: str) -> str:
+    """Default chunk id: sha256 of the chunk text, so identical chunks are stored once."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def read_blocks(path, block_chars: int = BLOCK_CHARS) -> Iterator[str]:
+    """Yield a text file in blocks of about `block_chars`, cut at line boundaries."""
+    block, size = [], 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            block.append(line)
+            size += len(line)
+            if size >= block_chars:
+                yield "".join(block)
+                block, size = [], 0
+    if block:
+        yield "".join(block)
+
+
+def iter_text_files(paths: Iterable, patterns: Sequence[str] = TEXT_PATTERNS,
+                    block_chars: int = BLOCK_CHARS) -> Iterator[tuple[str, Iterator[str]]]:
+    """Yield (source, blocks) for every file under `paths` (files or directories), in a stable order."""
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files = sorted({f for pattern in patterns for f in path.rglob(pattern) if f.is_file()})
+        else:
+            files = [path]
+        for file in files:
+            yield str(file), read_blocks(file, block_chars)
+
+
+def iter_texts(texts: Iterable[str], prefix: str = "doc") -> Iterator[tuple[str, Iterator[str]]]:
+    """Adapt in-memory strings to the (source, blocks) shape ingest_stream expects."""
+    for i, text in enumerate(texts):
+        yield f"{prefix}-{i}", iter([text])
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _load_checkpoint(path) -> dict:
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {"sources_done": 0, "last_source": None, "source": None, "chunks": 0}
+
+
+def _save_checkpoint(path, state: dict):
+    # write-then-rename, so a crash never leaves a half-written checkpoint
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def ingest_stream(
+    vector_store,
+    sources: Iterable[tuple[str, Iterable[str]]],
+    embeddings: Embeddings,
+    splitter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = DEFAULT_WORKERS,
+    checkpoint_path: Optional[str] = None,
+    id_fn: Callable[[str, int, str], str] = content_id,
+    skip_existing: bool = False,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+) -> dict:
+    """
+    Split, embed and upsert a stream of (source, text blocks) into a LangChain Chroma store.
+
+    Chunks are numbered per source; `id_fn(source, index, text)` gives each chunk's id.
+    With `skip_existing`, ids already in the collection are not embedded again.
+    Embedded chunks are written in bulk upserts of up to `write_batch_size` rows.
+    With `checkpoint_path`, sources (and chunks of a partly indexed source) recorded
+    as done by a previous run are skipped; delete the file to start over. The
+    checkpoint is a cursor into the source stream (how many sources are done and the
+    name of the last one), so `sources` must come in the same order on every run, as
+    iter_text_files does. It is saved after every upsert, so it never runs ahead of
+    the store, and its size does not grow with the corpus.
+    Chunks that span a block boundary are cut there (overlap does not cross blocks).
+
+    Returns {"received_chunks", "added_chunks", "skipped_chunks"}.
+    """
+    collection = vector_store._collection
+    state = _load_checkpoint(checkpoint_path)
+    stats = {"received_chunks": 0, "added_chunks": 0, "skipped_chunks": 0}
+    inflight = set()  # ids produced but not yet written; repeats of them are skipped
+
+    def chunks():
+        for position, (source, blocks) in enumerate(sources):
+            if position < state["sources_done"]:
+                if position == state["sources_done"] - 1 and source != state["last_source"]:
+                    raise ValueError(
+                        f"checkpoint {checkpoint_path} ends at {state['last_source']!r}, but source "
+                        f"#{position + 1} is {source!r}; the sources changed order, delete the checkpoint to start over"
+                    )
+                continue
+            resume_at = state["chunks"] if source == state["source"] else 0
+            index = 0
+            for block in blocks:
+                for text in splitter.split_text(block):
+                    if index >= resume_at:
+                        yield source, index, Document(page_content=text, metadata={"source": source})
+                    index += 1
+            # marks the end of a source (carrying its position in the stream), so it is
+            # recorded as done even if it had no new chunks
+            yield source, position, None
+
+    def new_batches():
+        for batch in batched(chunks(), batch_size):
+            rows, seen = [], set()
+            for source, index, doc in batch:
+                if doc is None:
+                    rows.append((None, source, index, None))
+                    continue
+                stats["received_chunks"] += 1
+                chunk_id = id_fn(source, index, doc.page_content)
+                if chunk_id in seen or chunk_id in inflight:
+                    stats["skipped_chunks"] += 1
+                    continue
+                seen.add(chunk_id)
+                rows.append((chunk_id, source, index, doc))
+            if skip_existing and seen:
+                existing = set(collection.get(ids=list(seen), include=[])["ids"])
+                stats["skipped_chunks"] += len(existing)
+                rows = [row for row in rows if row[3] is None or row[0] not in existing]
+            inflight.update(row[0] for row in rows if row[3] is not None)
+            yield rows
+
+    def texts_of(rows):
+        return [doc.page_content for _, _, _, doc in rows if doc is not None]
+
+    pending_rows, pending_docs = [], []
+
+    def flush():
+        if pending_docs:
+            _upsert(collection, pending_docs)
+            stats["added_chunks"] += len(pending_docs)
+            inflight.difference_update(chunk_id for chunk_id, _, _ in pending_docs)
+        for chunk_id, source, index, doc in pending_rows:
+            if doc is None:
+                # end-of-source marker: everything from this source is stored
+                state["sources_done"], state["last_source"] = index + 1, source
+                state["source"], state["chunks"] = None, 0
+            else:
+                state["source"], state["chunks"] = source, index + 1
+        if checkpoint_path and pending_rows:
+            _save_checkpoint(checkpoint_path, state)
+        pending_rows.clear()
+        pending_docs.clear()
+
+    for rows, vectors in embed_batches(embeddings, _skip_empty(new_batches()), max_workers=max_workers,
+                                       texts_of=texts_of):
+        docs = [(chunk_id, doc) for chunk_id, _, _, doc in rows if doc is not None]
+        pending_docs.extend((chunk_id, doc, vector) for (chunk_id, doc), vector in zip(docs, vectors))
+        pending_rows.extend(rows)
+        if len(pending_docs) >= write_batch_size:
+            flush()
+    flush()
+    return stats
+
+
+def _skip_empty(batches):
+    for rows in batches:
+        if rows:
+            yield rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import chromadb
+    from chromadb.config import Settings
+    from langchain_community.embeddings import OllamaEmbeddings
+    from langchain_community.vectorstores import Chroma
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from common.embedding_cache import CachedEmbeddings
+
+    parser = argparse.ArgumentParser(description="Stream text files into a persistent Chroma collection.")
+    parser.add_argument("paths", nargs="+", help="files or directories (*.txt, *.md)")
+    parser.add_argument("--persist-directory", default="./chroma_db")
+    parser.add_argument("--collection", default="corpus")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--base-url", default=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--checkpoint", help="progress file; rerun with the same file to resume")
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings(OllamaEmbeddings(model=args.model, base_url=args.base_url))
+    store = Chroma(
+        client=chromadb.PersistentClient(path=args.persist_directory, settings=Settings(anonymized_telemetry=False)),
+        collection_name=args.collection,
+        embedding_function=embeddings,
+    )
+    start = time.perf_counter()
+    result = ingest_stream(
+        store,
+        iter_text_files(args.paths),
+        embeddings,
+        RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+        batch_size=args.batch_size,
+        max_workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        skip_existing=True,
+    )
+    print(f"{result} in {time.perf_counter() - start:.1f}s")
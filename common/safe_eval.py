@@ -0,0 +1,158 @@
+"""
+Safe arithmetic evaluator for the calculator tools (a replacement for eval).
+
+Only numeric literals, parentheses and the operators the calculator prompt allows
+(+, -, *, /, **, //, %, unary +/-) are accepted; names, calls, attributes and
+everything else are rejected. An expression is parsed once into a tree of closures
+and cached, so repeated expressions skip parsing and validation.
+
+Resource limits keep a hostile or hallucinated expression from stalling a worker:
+expression length, node count (the step budget; there are no loops, so each node
+is evaluated at most once), exponent size and integer size (checked before `**`
+runs, so `9**9**9` fails immediately instead of computing).
+
+    safe_eval("(3 + 5) * 2 + 5**2")   # 41
+    safe_eval("9**9**9")              # raises ExpressionError
+
+With allow_math=True a small whitelist of math functions (sqrt, sin, cos, tan,
+log, exp) and constants (pi, e) is accepted as well:
+
+    safe_eval("2 * sqrt(16) + sin(pi / 2)", allow_math=True)   # 9.0
+"""
+import ast
+import math
+import operator
+from functools import lru_cache
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 200
+MAX_EXPONENT = 10_000
+MAX_INT_BITS = 4096
+COMPILED_CACHE_SIZE = 1024
+
+
+class ExpressionError(ValueError):
+    """The expression is not plain arithmetic, or exceeds a resource limit."""
+
+
+def _check_result(value):
+    if isinstance(value, complex):
+        raise ExpressionError("complex results are not supported")
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionError("result is too large")
+    if isinstance(value, float) and math.isinf(value):
+        raise ExpressionError("result is too large")
+    return value
+
+
+def _pow(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise ExpressionError(f"exponent {exponent} exceeds {MAX_EXPONENT}")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        # estimate the size of the result before computing it
+        if max(base.bit_length() - 1, 0) * exponent > MAX_INT_BITS:
+            raise ExpressionError("result is too large")
+    return base ** exponent
+
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+MATH_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": math.log,
+    "exp": math.exp,
+}
+
+MATH_CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+}
+
+
+def _call_math(func, args):
+    try:
+        return func(*args)
+    except (TypeError, ValueError) as e:
+        # wrong arity or domain error, e.g. sqrt(-1)
+        raise ExpressionError(f"{func.__name__}: {e}") from None
+
+
+def _compile_node(node, budget: list, allow_math: bool):
+    budget[0] -= 1
+    if budget[0] < 0:
+        raise ExpressionError(f"expression has more than {MAX_NODES} nodes")
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ExpressionError(f"unsupported literal: {value!r}")
+        _check_result(value)
+        return lambda: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        op = _BINARY_OPS[type(node.op)]
+        left = _compile_node(node.left, budget, allow_math)
+        right = _compile_node(node.right, budget, allow_math)
+        return lambda: _check_result(op(left(), right()))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand, budget, allow_math)
+        return lambda: op(operand())
+
+    if allow_math and isinstance(node, ast.Name) and node.id in MATH_CONSTANTS:
+        value = MATH_CONSTANTS[node.id]
+        return lambda: value
+
+    if (
+        allow_math
+        and isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in MATH_FUNCTIONS
+        and not node.keywords
+    ):
+        func = MATH_FUNCTIONS[node.func.id]
+        args = [_compile_node(arg, budget, allow_math) for arg in node.args]
+        return lambda: _check_result(_call_math(func, [arg() for arg in args]))
+
+    raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression: str, allow_math: bool = False):
+    """Parse and validate `expression`; return a zero-argument callable that evaluates it."""
+    expression = expression.strip()
+    if not expression:
+        raise ExpressionError("empty expression")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"invalid expression: {e.msg}") from None
+    return _compile_node(tree.body, [MAX_NODES], allow_math)
+
+
+def safe_eval(expression: str, allow_math: bool = False):
+    """Evaluate a plain arithmetic expression. Raises ExpressionError (a ValueError) or ZeroDivisionError."""
+    compiled = compile_expression(expression, allow_math)
+    try:
+        return compiled()
+    except OverflowError:
+        raise ExpressionError("result is too large") from None
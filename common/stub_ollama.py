@@ -0,0 +1,67 @@
+"""
+Tiny stand-in for the Ollama HTTP API, used by the benchmark scripts.
+
+It answers /api/generate, /api/chat (streamed NDJSON) and /api/embeddings after a
+fixed artificial delay, so latency and concurrency can be measured without a GPU
+or a real model. Every request is served on its own thread, like the real daemon.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_SIZE = 16
+
+
+def fake_embedding(text: str) -> list[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [b / 255.0 for b in digest[:EMBEDDING_SIZE]]
+
+
+def start_stub_server(generate_delay: float = 0.5, embed_delay: float = 0.01, tokens: int = 5, port: int = 0):
+    """Start the stub on a background thread. Returns (server, base_url); call server.shutdown() to stop."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are separate writes; without this, keep-alive clients pay a delayed-ACK stall
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json_lines(self, lines):
+            body = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/embeddings":
+                time.sleep(embed_delay)
+                self._send_json_lines([{"embedding": fake_embedding(payload.get("prompt", ""))}])
+            elif self.path == "/api/embed":
+                inputs = payload.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                time.sleep(embed_delay)
+                self._send_json_lines([{"embeddings": [fake_embedding(text) for text in inputs]}])
+            elif self.path == "/api/generate":
+                time.sleep(generate_delay)
+                lines = [{"response": f"token{i} ", "done": False} for i in range(tokens)]
+                self._send_json_lines(lines + [{"response": "", "done": True}])
+            elif self.path == "/api/chat":
+                time.sleep(generate_delay)
+                lines = [{"message": {"role": "assistant", "content": f"token{i} "}, "done": False} for i in range(tokens)]
+                self._send_json_lines(lines + [{"message": {"role": "assistant", "content": ""}, "done": True}])
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,128 @@
+"""
+Memoization for agent tools.
+
+A ReAct agent often calls the same tool with the same input several times in one
+run ("search again to be sure"), and again for the next request. Decorate the tool
+function (below @tool) and repeated calls are answered from an in-process cache:
+
+    @tool
+    @tool_cache(ttl_seconds=3600, max_entries=512)
+    def calculator(expression: str) -> str:
+        ...
+
+Each decorated function has its own TTL and size bound (LRU eviction). Caches can
+be tagged and dropped together when the underlying data changes:
+
+    @tool_cache(ttl_seconds=60, tags=("users",))
+    def get_user(...): ...
+
+    invalidate("users")   # e.g. from a DB write hook
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+_registry = []  # every ToolCache created, for tag-based invalidation
+_registry_lock = threading.Lock()
+
+
+def _make_key(signature, args, kwargs):
+    # bind to the signature, so f("a"), f(x="a") and f() with default x="a" share one entry
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        key = (args, tuple(sorted(kwargs.items())))
+    else:
+        bound.apply_defaults()
+        key = tuple(bound.arguments.items())
+    try:
+        hash(key)
+    except TypeError:
+        key = repr(key)
+    return key
+
+
+class ToolCache:
+    """TTL + LRU cache for one tool's results. Use the instance as a decorator."""
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 256, tags=(), clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tags = frozenset(tags)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __call__(self, func):
+        signature = inspect.signature(func)
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _make_key(signature, args, kwargs)
+                value = self.get(key)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    self.put(key, value)
+                return value
+
+            async_wrapper.cache = self
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(signature, args, kwargs)
+            value = self.get(key)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                self.put(key, value)
+            return value
+
+        wrapper.cache = self
+        return wrapper
+
+
+def tool_cache(ttl_seconds: float = 300.0, max_entries: int = 256, tags=()) -> ToolCache:
+    """Decorator factory: cache a tool function's results for `ttl_seconds`."""
+    return ToolCache(ttl_seconds=ttl_seconds, max_entries=max_entries, tags=tags)
+
+
+def invalidate(tag: str = None):
+    """Drop every cache carrying `tag` (all caches when tag is None)."""
+    with _registry_lock:
+        caches = list(_registry)
+    for cache in caches:
+        if tag is None or tag in cache.tags:
+            cache.clear()
@@ -0,0 +1,120 @@
+"""
+Two-tier answer cache for the RAG service.
+
+Tier 1 is an exact match on the normalized question text.
+Tier 2 is a semantic match: the cosine similarity between question embeddings
+must reach `similarity_threshold`.
+Both tiers share the same TTL and LRU size bound, and `clear()` drops everything
+(call it whenever the vector store changes, since cached answers may be stale).
+`clear()` also bumps `version`: callers note it before retrieval and pass it to
+`put`, so an answer generated from the old corpus is not cached after the clear.
+The semantic tier keeps its unit vectors as rows of one NumPy matrix, so a lookup
+is a single matrix-vector product instead of a Python loop over every entry.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._exact = OrderedDict()     # normalized question -> (answer, expires_at)
+        self._semantic = OrderedDict()  # normalized question -> row in the matrices below, in LRU order
+        self._vectors = None            # (max_entries, dim) unit embeddings, allocated on first put
+        self._expires = np.full(max_entries, -np.inf)  # unused rows never match
+        self._answers = [None] * max_entries
+        self._keys = [None] * max_entries
+        self._lock = threading.Lock()
+        self.version = 0  # bumped by clear(), i.e. on every vector store write
+
+    def get_exact(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            answer, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._exact[key]
+                return None
+            self._exact.move_to_end(key)
+            return answer
+
+    def get_semantic(self, embedding: list[float]) -> Optional[str]:
+        query = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if not self._semantic or self._vectors.shape[1] != len(query):
+                return None
+            scores = self._vectors @ query
+            scores[self._expires < now] = -np.inf
+            row = int(np.argmax(scores))
+            if scores[row] < self.similarity_threshold:
+                return None
+            self._semantic.move_to_end(self._keys[row])
+            return self._answers[row]
+
+    def put(self, question: str, embedding: Optional[list[float]], answer: str, version: Optional[int] = None):
+        """Cache `answer`, unless it is empty or the store changed since `version` was read."""
+        if not answer or not answer.strip():
+            return
+        key = normalize_question(question)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._exact[key] = (answer, expires_at)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+            if embedding is not None:
+                self._put_vector(key, _unit(embedding), answer, expires_at)
+
+    def _put_vector(self, key: str, vector: np.ndarray, answer: str, expires_at: float):
+        if self._vectors is None or self._vectors.shape[1] != len(vector):
+            # first entry, or the embedding model changed: start a fresh matrix
+            self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            self._clear_semantic()
+        row = self._semantic.get(key)
+        if row is None:
+            if len(self._semantic) >= self.max_entries:
+                # reuse the least recently used row
+                _, row = self._semantic.popitem(last=False)
+            else:
+                row = len(self._semantic)
+        self._semantic[key] = row
+        self._semantic.move_to_end(key)
+        self._vectors[row] = vector
+        self._expires[row] = expires_at
+        self._answers[row] = answer
+        self._keys[row] = key
+
+    def _clear_semantic(self):
+        self._semantic.clear()
+        self._expires[:] = -np.inf
+        self._answers = [None] * self.max_entries
+        self._keys = [None] * self.max_entries
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._clear_semantic()
+            self.version += 1
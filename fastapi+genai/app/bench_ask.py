@@ -0,0 +1,82 @@
+"""
+Throughput benchmark for /ask: the old per-request chatbot vs the shared async one.
+
+Both paths use a stub chat model with a fixed latency. The stub sleeps with
+time.sleep when called synchronously and asyncio.sleep when awaited, like a real
+HTTP client would block or yield.
+
+Old path: build prompt + chain + RunnableWithMessageHistory per call, blocking invoke.
+New path: main.generate_answer (chatbot built once, ainvoke).
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_ask.py --requests 20 --delay 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+import main
+
+
+class StubChatModel(FakeListChatModel):
+    delay: float = 0.2
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.responses[0]))])
+
+
+async def old_ask(stub, question: str, session_id: str):
+    """The previous implementation: everything rebuilt per request and a blocking invoke."""
+    prompt = ChatPromptTemplate(
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant, give answer in one line."},
+            {"role": "ai", "content": "Conversation so far:\n{history}"},
+            {"role": "user", "content": "{question}"}
+        ]
+    )
+    chatbot = RunnableWithMessageHistory(
+        prompt | stub,
+        main.get_chat_history,
+        input_messages_key="question",
+        history_messages_key="history",
+    )
+    result = chatbot.invoke({"question": question}, config={"configurable": {"session_id": session_id}})
+    return result.content
+
+
+async def new_ask(question: str, session_id: str):
+    answer, _ = await main.generate_answer(question, session_id)
+    return answer
+
+
+async def measure(label: str, make_call, requests: int):
+    start = time.perf_counter()
+    await asyncio.gather(*[make_call(f"question {i}", f"session-{label}-{i}") for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:>4}: {requests} requests in {elapsed:.3f}s -> {requests / elapsed:.1f} req/s")
+
+
+async def run(requests: int, delay: float):
+    stub = StubChatModel(responses=["stub answer"], delay=delay)
+    main.chatbot = main.build_chatbot(stub)
+    await measure("old", lambda q, s: old_ask(stub, q, s), requests)
+    await measure("new", new_ask, requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.2, help="stub model latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.delay))
@@ -0,0 +1,63 @@
+"""
+Question-embedding benchmark against a local stub Ollama server.
+
+Embeds N distinct questions concurrently three ways:
+  - concurrent aembed_query on langchain_community's OllamaEmbeddings (no batching)
+  - EmbeddingBatcher over that class (one aembed_documents call per window, which
+    still loops over /api/embeddings one text at a time: the old path)
+  - EmbeddingBatcher over BatchedOllamaEmbeddings (one /api/embed request per window)
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_embed_batcher.py --questions 16 --delay 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from common.stub_ollama import start_stub_server
+from embed_batcher import BatchedOllamaEmbeddings, EmbeddingBatcher
+
+
+class DocumentsAsQueries:
+    """The old batcher path: a whole window goes to aembed_documents."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    async def aembed_queries(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+
+
+async def timed(label, questions, embed):
+    start = time.perf_counter()
+    vectors = await asyncio.gather(*[embed(q) for q in questions])
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(questions)
+    print(f"{label:<40}: {elapsed:.3f}s")
+    return elapsed
+
+
+async def run(questions: int, delay: float):
+    from langchain_community.embeddings.ollama import OllamaEmbeddings
+
+    server, base_url = start_stub_server(embed_delay=delay)
+    texts = [f"What is SIP? ({i})" for i in range(questions)]
+
+    community = OllamaEmbeddings(model="stub", base_url=base_url)
+    await timed("concurrent aembed_query (community)", texts, community.aembed_query)
+
+    old = EmbeddingBatcher(DocumentsAsQueries(community), max_batch_size=questions)
+    await timed("EmbeddingBatcher over community (old)", texts, old.embed)
+
+    new = EmbeddingBatcher(BatchedOllamaEmbeddings(model="stub", base_url=base_url), max_batch_size=questions)
+    await timed("EmbeddingBatcher over /api/embed (new)", texts, new.embed)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.05, help="stub latency per embedding request in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.questions, args.delay))
@@ -0,0 +1,59 @@
+"""
+Ingestion throughput benchmark against a local stub Ollama server.
+
+Embeds the same set of chunks into a fresh in-memory Chroma collection, first the
+old way (Chroma.add_documents, one embedding request after another) and then
+through common.ingest.upsert_documents with an increasing number of workers.
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_ingest.py --chunks 400 --delay 0.01 --workers 1 2 4 8 16
+"""
+import argparse
+import time
+
+from common.ingest import upsert_documents
+from common.stub_ollama import start_stub_server
+
+
+def make_collection(embeddings, name):
+    import chromadb
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(client=chromadb.EphemeralClient(), collection_name=name, embedding_function=embeddings)
+
+
+def run(chunks: int, delay: float, workers: list[int], batch_size: int):
+    from langchain_community.embeddings.ollama import OllamaEmbeddings
+    from langchain_core.documents import Document
+
+    server, base_url = start_stub_server(embed_delay=delay)
+    # plain OllamaEmbeddings (no cache), so every run really embeds every chunk
+    embeddings = OllamaEmbeddings(model="stub", base_url=base_url)
+    documents = [Document(page_content=f"chunk {i}: " + "lorem ipsum " * 8) for i in range(chunks)]
+    ids = [str(i) for i in range(chunks)]
+
+    vs = make_collection(embeddings, "sequential")
+    start = time.perf_counter()
+    vs.add_documents(documents, ids=ids)
+    baseline = time.perf_counter() - start
+    print(f"sequential add_documents : {baseline:.3f}s  ({chunks / baseline:.0f} chunks/s)")
+
+    for n in workers:
+        vs = make_collection(embeddings, f"workers-{n}")
+        start = time.perf_counter()
+        written = upsert_documents(vs, documents, ids, embeddings, batch_size=batch_size, max_workers=n)
+        elapsed = time.perf_counter() - start
+        assert written == vs._collection.count() == chunks
+        print(f"upsert_documents x{n:<3}   : {elapsed:.3f}s  ({chunks / elapsed:.0f} chunks/s, {baseline / elapsed:.1f}x)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=400)
+    parser.add_argument("--delay", type=float, default=0.01, help="stub latency per embedding request in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    run(args.chunks, args.delay, args.workers, args.batch_size)
@@ -0,0 +1,54 @@
+"""
+Load benchmark for /knowledge-chat against a local stub Ollama server.
+
+Fires N concurrent requests and compares the wall time with the single-request
+latency. If requests overlap, wall time stays close to one request's latency;
+if the event loop is blocked, it grows to roughly N times that.
+
+Run from this folder, with the repo root on PYTHONPATH (see README.md):
+    python bench_knowledge_chat.py --requests 10 --delay 0.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common.stub_ollama import start_stub_server
+
+
+async def run(requests: int, delay: float):
+    server, base_url = start_stub_server(generate_delay=delay)
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "embedding_cache.db"))
+
+    import httpx
+    import rag
+
+    await rag.startup_event()
+    transport = httpx.ASGITransport(app=rag.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await client.get("/knowledge-chat", params={"question": "What is SIP?"})
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.get("/knowledge-chat", params={"question": f"What is SIP? ({i})"}) for i in range(requests)
+        ])
+        total = time.perf_counter() - start
+
+    server.shutdown()
+    ok = sum(r.status_code == 200 for r in responses)
+    print(f"single request latency : {single:.3f}s")
+    print(f"{requests} concurrent requests : {total:.3f}s ({ok}/{requests} ok)")
+    print(f"serialized would take  : ~{single * requests:.3f}s")
+    print(f"overlap factor         : {single * requests / total:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.5, help="stub generation latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.delay))
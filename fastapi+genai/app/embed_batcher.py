@@ -0,0 +1,101 @@
+"""
+Async micro-batcher for query embeddings.
+
+Concurrent requests call `await batcher.embed(text)`. The first text waits up to
+`max_wait_ms` for company (or until `max_batch_size` texts are queued), then the
+whole batch goes to the model in one `aembed_queries` call and each caller gets
+its own vector back.
+
+Batching only pays off if that call is a single request. langchain_community's
+OllamaEmbeddings loops over /api/embeddings one text at a time, so the app embeds
+through BatchedOllamaEmbeddings instead: langchain_ollama sends the whole list to
+/api/embed in one request.
+"""
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import OllamaEmbeddings
+
+
+class BatchedOllamaEmbeddings(Embeddings):
+    """
+    Multi-input Ollama embeddings (/api/embed) that keep the passage/query instructions
+    langchain_community's OllamaEmbeddings prepends, so questions are still embedded
+    as queries and chunks as passages.
+    """
+
+    def __init__(self, model: str, base_url: str, embed_instruction: str = "passage: ",
+                 query_instruction: str = "query: "):
+        self.model = model
+        self.client = OllamaEmbeddings(model=model, base_url=base_url)
+        self.embed_instruction = embed_instruction
+        self.query_instruction = query_instruction
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.client.embed_documents([self.embed_instruction + text for text in texts])
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.client.aembed_documents([self.embed_instruction + text for text in texts])
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self.client.embed_documents([self.query_instruction + text for text in texts])
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        return await self.client.aembed_documents([self.query_instruction + text for text in texts])
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_queries([text]))[0]
+
+
+class EmbeddingBatcher:
+    def __init__(self, embeddings, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> list[float]:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await self.embeddings.aembed_queries(texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
@@ -1,12 +1,14 @@
 from fastapi import FastAPI, Query, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+import os
 import uvicorn
 from langchain_community.chat_models import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
+from session_store import SessionStore
+
 app = FastAPI(title="QA Service")
 
 llm = ChatOllama(model="phi3", temperature=0)
@@ -15,48 +17,60 @@ class AnswerResponse(BaseModel):
     question: str
     answer: str
 
-memory_store = {}
+# Per-session histories with LRU / idle-TTL eviction, per-session message and token caps and a global size budget
+session_store = SessionStore(
+    max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+    idle_ttl_seconds=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+    max_messages_per_session=int(os.getenv("MAX_SESSION_MESSAGES", "20")),
+    max_tokens_per_session=int(os.getenv("MAX_HISTORY_TOKENS", "1024")),
+    max_total_chars=int(os.getenv("SESSION_MEMORY_BUDGET_CHARS", "5000000")),
+)
 
 def get_chat_history(session_id: str):
-    if session_id not in memory_store:
-        memory_store[session_id] = InMemoryChatMessageHistory()
-    return memory_store[session_id]
+    return session_store.get(session_id)
 
-def generate_answer(question: str) -> str:
-    """
-    Simple placeholder answer generator.
-    Replace this with a call to an LLM or other service as needed.
-    """
-    prompt = ChatPromptTemplate(
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant, give answer in one line."},
-            {"role": "ai", "content": "Conversation so far:\n{history}"},
-            {"role": "user", "content": "{question}"}
-        ]
-    )
-    chain = prompt | llm
-    chatbot = RunnableWithMessageHistory(
-        chain,
+# Prompt and chatbot are built once at import and shared by every request.
+# History goes in as real messages (already windowed to MAX_HISTORY_TOKENS by the session store).
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant, give answer in one line."),
+    MessagesPlaceholder(variable_name="history"),
+    ("human", "{question}"),
+])
+
+def build_chatbot(chat_llm):
+    return RunnableWithMessageHistory(
+        PROMPT | chat_llm,
         get_chat_history,
         input_messages_key="question",
         history_messages_key="history",
     )
-    result = chatbot.invoke({"question": question}, config={"configurable": {"session_id": "default_session"}})
-    history = get_chat_history("default_session")
-    print(history)
+
+chatbot = build_chatbot(llm)
+
+async def generate_answer(question: str, session_id: str) -> str:
+    """
+    Answer the question in the context of the session's history.
+    ainvoke keeps the event loop free while the model is generating.
+    """
+    result = await chatbot.ainvoke({"question": question}, config={"configurable": {"session_id": session_id}})
+    history = get_chat_history(session_id)
     return result.content, history
 
 
 @app.get("/ask", response_model=AnswerResponse)
-async def ask(question: Optional[str] = Query(None, min_length=1, description="Question text")):
+async def ask(
+    question: Optional[str] = Query(None, min_length=1, description="Question text"),
+    session_id: str = Query(..., min_length=1, max_length=128, description="Client-chosen conversation id"),
+):
     """
-    GET /ask?question=...
+    GET /ask?question=...&session_id=...
     Returns a JSON object with the original question and a generated answer.
+    Each session_id gets its own (bounded) conversation history.
     """
     if not question:
         raise HTTPException(status_code=400, detail="Query parameter 'question' is required")
 
-    answer, history = generate_answer(question)
+    answer, history = await generate_answer(question, session_id)
     return AnswerResponse(question=question, answer=answer)
 
 
@@ -0,0 +1,82 @@
+"""
+Per-stage latency instrumentation for the RAG service.
+
+Wrap a stage in `with span("retrieve"):` and its perf_counter duration is
+  - added to the current request's timings dict (see `start_request`), and
+  - observed into a process-wide histogram for that stage.
+
+`render_prometheus()` returns all histograms in the Prometheus text exposition
+format, so p50/p95/p99 per stage can be computed with histogram_quantile().
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+STAGES = ("embed", "retrieve", "prompt", "generate", "parse", "total", "warmup")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_NAME = "rag_stage_duration_seconds"
+
+_request_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self.counts[i] += 1
+
+
+_histograms = {stage: Histogram() for stage in STAGES}
+
+
+def start_request() -> dict:
+    """Start a fresh timings dict for the current request context and return it."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def observe(stage: str, seconds: float):
+    if stage not in _histograms:
+        _histograms[stage] = Histogram()
+    _histograms[stage].observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, perf_counter() - start)
+
+
+def render_prometheus() -> str:
+    lines = [
+        f"# HELP {METRIC_NAME} Latency of each stage of the RAG request path.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage, hist in _histograms.items():
+        with hist._lock:
+            counts, total, count = list(hist.counts), hist.sum, hist.count
+        for upper, bucket_count in zip(hist.buckets, counts):
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{upper}"}} {bucket_count}')
+        lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
+from typing import Optional
 import uvicorn
-import time
+import json
+import logging
+import contextvars
+from time import perf_counter
+from operator import itemgetter
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from langchain_community.embeddings.ollama import OllamaEmbeddings
 
 from langchain_community.vectorstores import Chroma
 from chromadb import Client
@@ -15,123 +22,311 @@ from langchain_community.llms.ollama import Ollama
 from langchain_classic.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
+
+from common.embedding_cache import CachedEmbeddings
+from common.ingest import ingest_stream, iter_texts
+from answer_cache import AnswerCache
+from embed_batcher import BatchedOllamaEmbeddings, EmbeddingBatcher
+from metrics import observe, span, start_request, render_prometheus
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
 
 class AnswerResponse(BaseModel):
     question: str
     answer: str
+    cached: bool = False
+    cache_tier: Optional[str] = None  # "exact" or "semantic" on a cache hit
 
 class AIResponse(BaseModel):
     answer: str
 
+class DocumentsRequest(BaseModel):
+    documents: list[str]
+
+class DocumentsResponse(BaseModel):
+    received_chunks: int
+    added_chunks: int
+    skipped_chunks: int
+
+# Chunking / ingestion settings
+CHUNK_SIZE = 100
+CHUNK_OVERLAP = 50
+EMBED_BATCH_SIZE = 32
+# New chunks are embedded on this many threads, EMBED_BATCH_SIZE at a time (one /api/embed request per batch)
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+RETRIEVAL_K = 3
+
+# Concurrent question embeddings arriving within the window are sent as one batch
+EMBED_QUERY_BATCH_SIZE = int(os.getenv("EMBED_QUERY_BATCH_SIZE", "16"))
+EMBED_QUERY_WAIT_MS = float(os.getenv("EMBED_QUERY_WAIT_MS", "5"))
+
+# Set RAG_TIMING_HEADER=1 to return per-stage timings as JSON in the X-Stage-Timings header
+# (not on /knowledge-chat/stream: headers are sent before the stream runs; use /metrics)
+TIMING_HEADER = os.getenv("RAG_TIMING_HEADER", "false").lower() in ("1", "true")
+
+# Chroma queries are blocking; run them on a bounded pool so they never block the event loop
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+# Answer cache in front of retrieval + generation; cleared whenever the vector store changes
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    similarity_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+)
+
 # Globals for single reusable instances
 _global_embedding_model = None
+_global_embedding_batcher = None
 _global_vector_store = None
 _global_retriever = None
 _global_ollama_llm = None
+_global_rag_chains = {}
+_global_answer_chains = {}
+
+# Parsed once at import; every request only fills in the variables
+RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a financial assistant. "
+     "Answer using only the provided context.\n\n"
+     "Context:\n{context}\n\n"
+    #  "{format_instructions}"
+    ),
+    ("human", "{question}")
+])
+# parser = JsonOutputParser(pydantic_object=AIResponse)
 
 class LLM:
-    def __init__(self, model: str, num_predict: int, temperature: float):
+    def __init__(self, model: str, num_predict: int, temperature: float, base_url: str = None):
         self.model = model
         self.num_predict = num_predict
         self.temperature = temperature
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
     def create_embeddings_model(self):
         global _global_embedding_model, _global_ollama_llm
         if _global_embedding_model is None:
-            _global_ollama_llm = Ollama(model=self.model, temperature=self.temperature, num_predict=self.num_predict)
-            start_time = time.time()
-            _global_ollama_llm.invoke("warm up")
-            print("time taken 11: ", time.time() - start_time)
-            _global_embedding_model = OllamaEmbeddings(model=self.model)
+            _global_ollama_llm = Ollama(
+                model=self.model, temperature=self.temperature, num_predict=self.num_predict, base_url=self.base_url
+            )
+            with span("warmup"):
+                _global_ollama_llm.invoke("warm up")
+            # /api/embed vectors differ from the legacy /api/embeddings ones: keep them apart in the cache
+            _global_embedding_model = CachedEmbeddings(
+                BatchedOllamaEmbeddings(model=self.model, base_url=self.base_url), model_name=f"{self.model}@embed"
+            )
         return _global_embedding_model
 
-    def create_vector_store(self, chunks: list[Document]) -> Chroma:
+    def create_vector_store(self) -> Chroma:
         """
         Create the global vector store once. Subsequent calls reuse it.
         We persist the Chroma DB to ./chroma_db so it can survive restarts.
+        Documents are added through add_documents, never at construction time.
         """
         global _global_vector_store
         if _global_vector_store is None:
             client = Client(Settings(persist_directory="./chroma_db", anonymized_telemetry=False))
-            _global_vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.create_embeddings_model(),
+            _global_vector_store = Chroma(
                 collection_name="fastapi_rag_collection",
+                embedding_function=self.create_embeddings_model(),
                 client=client,
             )
-        # If you need to add new documents on the fly, implement add_documents here.
         return _global_vector_store
 
+    def add_documents(self, docs: list[str]) -> DocumentsResponse:
+        """
+        Split docs into chunks and upsert only the chunks not already in the store.
+        Chunk ids are the sha256 of the chunk text, so re-sending the same text is a no-op
+        and duplicate chunks inside one request are embedded once.
+        Docs are split and embedded as a stream (common.ingest.ingest_stream): new chunks
+        are embedded on EMBED_WORKERS threads in batches of EMBED_BATCH_SIZE and upserted
+        in bulk, so a large request never holds all of its chunks in memory.
+        """
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        stats = ingest_stream(
+            self.create_vector_store(),
+            iter_texts(text for text in docs if text.strip()),
+            self.create_embeddings_model(),
+            splitter,
+            batch_size=EMBED_BATCH_SIZE,
+            max_workers=EMBED_WORKERS,
+            skip_existing=True,
+        )
+        if stats["added_chunks"]:
+            # cached answers were produced from the old corpus
+            answer_cache.clear()
+
+        return DocumentsResponse(**stats)
+
     def create_retriever_from_text(self, docs: list[str]):
         """
-        Split docs into chunks, ensure vector store exists, and return the global retriever.
+        Add docs to the vector store (only unseen chunks get embedded) and return the global retriever.
         """
         global _global_retriever
-        # Build Document objects and split into chunks
-        documents = [Document(page_content=text) for text in docs]
-        splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=50)
-        chunks = splitter.split_documents(documents)
-
-        # Ensure the global vector store is created (first call will create it)
-        vs = self.create_vector_store(chunks)
+        self.add_documents(docs)
         if _global_retriever is None:
-            _global_retriever = vs.as_retriever(search_kwargs={"k": 3})
+            _global_retriever = self.create_vector_store().as_retriever(search_kwargs={"k": RETRIEVAL_K})
         return _global_retriever
 
-    def retrieve_context(self, inputs):
-        global _global_retriever
-        retriever = _global_retriever
-        # some retrievers expose `invoke`, others use `get_relevant_documents`
-        if hasattr(retriever, "invoke"):
-            start_time = time.time()
-            docs = retriever.invoke(inputs["question"])
-            print("time taken 8: ", time.time() - start_time)
-        else:
-            start_time = time.time()
-            docs = retriever.get_relevant_documents(inputs["question"])
-            print("time taken 9: ", time.time() - start_time)
-        start_time = time.time()
+    def create_embedding_batcher(self) -> EmbeddingBatcher:
+        """
+        Shared micro-batcher for question embeddings. Each window of questions is embedded
+        with one /api/embed request, with the query instruction, like embed_query.
+        """
+        global _global_embedding_batcher
+        if _global_embedding_batcher is None:
+            _global_embedding_batcher = EmbeddingBatcher(
+                self.create_embeddings_model(), max_batch_size=EMBED_QUERY_BATCH_SIZE, max_wait_ms=EMBED_QUERY_WAIT_MS
+            )
+        return _global_embedding_batcher
+
+    async def embed_question(self, question: str) -> list[float]:
+        with span("embed"):
+            return await self.create_embedding_batcher().embed(question)
+
+    def search_context(self, embedding: list[float]) -> str:
+        """Query the vector store with an already computed question embedding."""
+        with span("retrieve"):
+            docs = self.create_vector_store().similarity_search_by_vector(embedding, k=RETRIEVAL_K)
         result = "\n".join([d.page_content for d in docs])
-        print("time taken 10: ", time.time() - start_time)
-        print("Retrieved context:", result)
+        logger.debug("Retrieved context: %s", result)
         return result
 
-    async def generate(self, question: str, docs: list[str]) -> dict:
-        start_time = time.time()
-        global _global_ollama_llm
-        ollama_llm = _global_ollama_llm
-        print("time taken 1: ", time.time() - start_time)
-        start_time = time.time()
-        prompt = ChatPromptTemplate.from_messages([
-            ("system",
-             "You are a financial assistant. "
-             "Answer using only the provided context.\n\n"
-             "Context:\n{context}\n\n"
-            #  "{format_instructions}"
-            ),
-            ("human", "{question}")
-        ])
-        print("time taken 2: ", time.time() - start_time)
-        start_time = time.time()
-        # parser = JsonOutputParser(pydantic_object=AIResponse)
-        print("time taken 3: ", time.time() - start_time)
-        start_time = time.time()
-        reg_chain = (
-            {
-                "context": self.retrieve_context,
-                "question": RunnablePassthrough(),
+    def retrieve_context(self, inputs):
+        """
+        Embed the question and query the vector store directly (same as retriever.invoke),
+        so the embed and retrieve stages are timed separately.
+        """
+        embedding = inputs.get("embedding")
+        if embedding is None:
+            with span("embed"):
+                embedding = self.create_embeddings_model().embed_query(inputs["question"])
+        return self.search_context(embedding)
+
+    async def aretrieve_context(self, inputs):
+        """
+        Async retrieval: the question is embedded through the micro-batcher (unless the caller
+        already has its embedding) and the blocking vector-store query runs on the bounded pool.
+        """
+        embedding = inputs.get("embedding")
+        if embedding is None:
+            embedding = await self.embed_question(inputs["question"])
+        loop = asyncio.get_running_loop()
+        # run inside a copy of the request context so spans land in this request's timings
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(_retrieval_executor, ctx.run, self.search_context, embedding)
+
+    def _chain_key(self):
+        return (self.model, self.num_predict, self.temperature, self.base_url)
+
+    def build_answer_chain(self):
+        """
+        Return the compiled prompt | llm chain for this model configuration, building it on first use.
+        It expects the context to be retrieved already; the streaming endpoint uses it directly.
+        """
+        key = self._chain_key()
+        if key not in _global_answer_chains:
+            ollama_llm = Ollama(
+                model=self.model, temperature=self.temperature, num_predict=self.num_predict, base_url=self.base_url
+            )
+            _global_answer_chains[key] = RAG_PROMPT | ollama_llm  # | parser
+        return _global_answer_chains[key]
+
+    def build_chain(self):
+        """
+        Return the compiled RAG chain (retrieval + answer chain) for this model configuration.
+        Chains are kept per (model, num_predict, temperature, base_url) and reused across requests.
+        The prompt and llm steps are wrapped so each one records its own latency span.
+        """
+        key = self._chain_key()
+        if key not in _global_rag_chains:
+            prompt, ollama_llm = self.build_answer_chain().steps
+            _global_rag_chains[key] = {
+                "context": RunnableLambda(self.retrieve_context, afunc=self.aretrieve_context),
+                "question": itemgetter("question"),
                 # "format_instructions": lambda _: parser.get_format_instructions(),
-            } | prompt | ollama_llm
-            # | parser
-        )
-        print("time taken 4: ", time.time() - start_time)
-        start_time = time.time()
-        response = reg_chain.invoke({"question": question})
-        print("time taken 5: ", time.time() - start_time)
-        return response
+            } | timed("prompt", prompt) | timed("generate", ollama_llm)
+        return _global_rag_chains[key]
+
+    async def generate(self, question: str, docs: list[str], embedding: list[float] = None) -> dict:
+        reg_chain = self.build_chain()
+        # ainvoke uses Ollama's aiohttp client, so the event loop stays free while the model generates
+        return await reg_chain.ainvoke({"question": question, "embedding": embedding})
+
+    async def lookup_cache(self, question: str):
+        """
+        Check the exact tier, then the semantic tier.
+        Returns (answer, tier, question_embedding); answer and tier are None on a miss.
+        """
+        answer = answer_cache.get_exact(question)
+        if answer is not None:
+            return answer, "exact", None
+        embedding = await self.embed_question(question)
+        answer = answer_cache.get_semantic(embedding)
+        if answer is not None:
+            return answer, "semantic", embedding
+        return None, None, embedding
+
+    async def answer(self, question: str):
+        """
+        Answer from the cache when possible, otherwise run retrieval + generation and cache the result.
+        Returns (answer_text, cache_tier); cache_tier is None when the answer was generated.
+        """
+        # noted before retrieval: if documents are added meanwhile, this answer is not cached
+        version = answer_cache.version
+        answer_text, tier, embedding = await self.lookup_cache(question)
+        if answer_text is not None:
+            return answer_text, tier
+
+        # reuse the question embedding from the cache lookup for retrieval
+        response = await self.generate(question=question, docs=[], embedding=embedding)
+        # If response is a pydantic object, access .answer; if a dict, use ["answer"]
+        with span("parse"):
+            if hasattr(response, "answer"):
+                answer_text = response.answer
+            elif isinstance(response, dict):
+                answer_text = response.get("answer", "")
+            else:
+                answer_text = str(response)
+        answer_cache.put(question, embedding, answer_text, version=version)
+        return answer_text, None
+
+    async def stream(self, question: str):
+        """
+        Yield ("context", text) once retrieval finishes, then ("token", text) for each generated chunk.
+        On a cache hit yield ("cache", tier) and the whole cached answer as a single token instead.
+        """
+        version = answer_cache.version
+        answer_text, tier, embedding = await self.lookup_cache(question)
+        if answer_text is not None:
+            yield "cache", tier
+            yield "token", answer_text
+            return
+
+        inputs = {"question": question, "embedding": embedding}
+        context = await self.aretrieve_context(inputs)
+        yield "context", context
+        tokens = []
+        with span("generate"):
+            async for token in self.build_answer_chain().astream({"context": context, "question": question}):
+                if token:
+                    tokens.append(token)
+                    yield "token", token
+        answer_cache.put(question, embedding, "".join(tokens), version=version)
+
+def timed(stage: str, runnable):
+    """Wrap a runnable so each call is recorded as a latency span for `stage`."""
+    def run(inputs, config):
+        with span(stage):
+            return runnable.invoke(inputs, config)
+
+    async def arun(inputs, config):
+        with span(stage):
+            return await runnable.ainvoke(inputs, config)
+
+    return RunnableLambda(run, afunc=arun, name=stage)
 
 # Create one LLM instance and initialize global retriever/vector store at startup
 llm = LLM(model="phi3:mini", num_predict=150, temperature=0)
@@ -151,27 +346,73 @@ async def startup_event():
     try:
         # This will create the embedding model, vector store and retriever if not present
         llm.create_retriever_from_text(initial_docs)
+        llm.build_chain()
         print("Global embedding model, vector store and retriever initialized.")
     except Exception as e:
         print("Failed to initialize global store; will create on-demand. Error:", e)
 
+async def _observe_total_when_done(body_iterator, start: float):
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        observe("total", perf_counter() - start)
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    timings = start_request()
+    start = perf_counter()
+    response = await call_next(request)
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        # call_next returns before a stream is generated: time it until the last event is sent.
+        # Its timings are not known yet when the headers go out, so no X-Stage-Timings header.
+        response.body_iterator = _observe_total_when_done(response.body_iterator, start)
+        return response
+    observe("total", perf_counter() - start)
+    if TIMING_HEADER:
+        response.headers["X-Stage-Timings"] = json.dumps({k: round(v, 6) for k, v in timings.items()})
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/documents", response_model=DocumentsResponse)
+def add_documents(request: DocumentsRequest):
+    """
+    Grow the corpus without a restart: only chunks that are not already stored get embedded.
+    """
+    return llm.add_documents(request.documents)
+
 @app.get("/knowledge-chat", response_model=AnswerResponse)
 async def knowledge_chat(question: str):
-    start_time = time.time()
-    response = await llm.generate(question=question, docs=[])
-    print("time taken 6: ", time.time() - start_time)
-    # If you want to use the startup docs by default, pass them in; here we reuse retriever's docs
-    # If response is a pydantic object, access .answer; if a dict, use ["answer"]
-    start_time = time.time()
-    if hasattr(response, "answer"):
-        answer_text = response.answer
-    elif isinstance(response, dict):
-        answer_text = response.get("answer", "")
-    else:
-        answer_text = str(response)
-
-    print("time taken 7: ", time.time() - start_time)
-    return AnswerResponse(question=question, answer=answer_text)
+    # Cache hits skip retrieval and generation entirely
+    answer_text, cache_tier = await llm.answer(question)
+    return AnswerResponse(question=question, answer=answer_text, cached=cache_tier is not None, cache_tier=cache_tier)
+
+@app.get("/knowledge-chat/stream")
+async def knowledge_chat_stream(question: str):
+    """
+    Server-Sent Events version of /knowledge-chat.
+    Emits one `context` event with the retrieved chunks, a `token` event per generated chunk,
+    then a `done` event (or an `error` event if generation fails midway).
+    A cache hit emits a `cache` event with the tier instead of `context`, then the cached answer.
+    """
+    async def event_stream():
+        try:
+            async for event, data in llm.stream(question):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     # run module app; change module path if you rename file
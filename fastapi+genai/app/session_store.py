@@ -0,0 +1,120 @@
+"""
+Bounded, evicting store of per-session chat histories for the QA service.
+
+- each session keeps at most `max_messages_per_session` messages and at most
+  `max_tokens_per_session` (estimated) tokens; whole turns (a question and its
+  answer) are dropped, oldest first, and the newest turn is always kept
+- sessions idle for longer than `idle_ttl_seconds` are evicted
+- at most `max_sessions` sessions are kept, least recently used evicted first
+- the total message text across all sessions is kept under `max_total_chars`
+
+Limits are enforced whenever a session is fetched, i.e. at the start of every turn.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from pydantic import PrivateAttr
+
+from common.history_window import TokenWindow
+
+
+def _message_text(message) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+class BoundedChatMessageHistory(InMemoryChatMessageHistory):
+    """
+    In-memory history that keeps only the last `max_messages` messages, fitted to `max_tokens`.
+    Messages are grouped into turns (a human message and the replies after it) and evicted a
+    turn at a time, so the history never starts with an orphaned AI message; the newest turn
+    is kept even if it alone exceeds the budget.
+    Token counts are kept incrementally by a TokenWindow, so a turn never re-counts old messages.
+    """
+
+    max_messages: int = 20
+    max_tokens: int = 1024
+    _chars: int = PrivateAttr(default=0)
+    _window: TokenWindow = PrivateAttr(default=None)
+
+    def add_message(self, message):
+        if self._window is None:
+            # window items are turns (lists of messages); a turn is usually a question and its answer
+            self._window = TokenWindow(max_tokens=self.max_tokens, max_items=max(1, self.max_messages // 2))
+        super().add_message(message)
+        text = _message_text(message)
+        self._chars += len(text)
+        if message.type == "human" or not len(self._window):
+            evicted = self._window.append([message], text=text)
+        else:
+            self._window.items()[-1].append(message)
+            evicted = self._window.extend_last(text)
+        if evicted:
+            messages = [m for turn in evicted for m in turn]
+            self._chars -= sum(len(_message_text(m)) for m in messages)
+            del self.messages[:len(messages)]
+
+    def clear(self):
+        super().clear()
+        self._chars = 0
+        if self._window is not None:
+            self._window.clear()
+
+    @property
+    def size_chars(self) -> int:
+        return self._chars
+
+
+class SessionStore:
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_ttl_seconds: float = 1800,
+        max_messages_per_session: int = 20,
+        max_tokens_per_session: int = 1024,
+        max_total_chars: int = 5_000_000,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_messages_per_session = max_messages_per_session
+        self.max_tokens_per_session = max_tokens_per_session
+        self.max_total_chars = max_total_chars
+        self._sessions = OrderedDict()  # session_id -> (history, last_access); oldest access first
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> BoundedChatMessageHistory:
+        """Return the history for session_id, creating it if needed, and apply eviction."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.pop(session_id, None)
+            history = entry[0] if entry else BoundedChatMessageHistory(
+                max_messages=self.max_messages_per_session, max_tokens=self.max_tokens_per_session
+            )
+            self._sessions[session_id] = (history, now)
+            self._enforce_limits()
+        return history
+
+    def _evict_idle(self, now: float):
+        while self._sessions:
+            _, (_, last_access) = next(iter(self._sessions.items()))
+            if now - last_access <= self.idle_ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+    def _enforce_limits(self):
+        # never evict the session that was just accessed (it is last in the order)
+        total_chars = sum(history.size_chars for history, _ in self._sessions.values())
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or total_chars > self.max_total_chars
+        ):
+            _, (history, _) = self._sessions.popitem(last=False)
+            total_chars -= history.size_chars
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def total_chars(self) -> int:
+        with self._lock:
+            return sum(history.size_chars for history, _ in self._sessions.values())
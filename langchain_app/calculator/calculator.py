@@ -1,15 +1,21 @@
+import io
+import os
 import re
+
+import pandas as pd
 import streamlit as st
 from langchain_community.llms import Ollama
 from langchain_core.prompts import PromptTemplate
 from langchain_classic.chains import LLMChain, LLMMathChain
 
+from common.safe_eval import ExpressionError, compile_expression, safe_eval
 
 
 """
 Calculator app using Ollama (via LangChain) to convert natural-language
 calculation requests into a simple arithmetic expression (no math module or Python
-builtins allowed) and use eval to compute the result.
+builtins allowed) and compute the result with a safe arithmetic evaluator
+(common/safe_eval.py) instead of eval.
 
 @Developed By: Romil
 """
@@ -59,15 +65,70 @@ def extract_expression(text: str) -> str:
     return text.strip()
 
 
+def local_expression(text: str):
+    """
+    Return `text` as an expression that can be evaluated locally, or None when it
+    needs the LLM. Plain arithmetic plus sqrt/sin/cos/tan/log/exp/pi/e qualifies;
+    `#` comments are dropped and `^`, `×`, `÷` are read as **, *, /.
+    """
+    expr = text.split("#", 1)[0].strip()
+    expr = expr.replace("^", "**").replace("×", "*").replace("÷", "/")
+    try:
+        compile_expression(expr, allow_math=True)
+    except ExpressionError:
+        return None
+    return expr
+
+
+def solve_batch(requests: list[str], convert_chain, max_concurrency: int = 4) -> list[dict]:
+    """
+    Solve many calculation requests at once. Plain arithmetic is evaluated locally;
+    the rest is converted in one `convert_chain.batch` call (at most
+    `max_concurrency` LLM requests in flight) and then evaluated locally.
+    """
+    rows = []
+    for request in requests:
+        expr = local_expression(request)
+        rows.append({"request": request, "expression": expr, "source": "local" if expr is not None else "llm",
+                     "result": None, "error": None})
+
+    pending = [row for row in rows if row["expression"] is None]
+    if pending:
+        outputs = convert_chain.batch(
+            [row["request"] for row in pending],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+        for row, raw in zip(pending, outputs):
+            if isinstance(raw, Exception):
+                row["error"] = f"LLM conversion failed: {raw}"
+            else:
+                row["expression"] = extract_expression(raw).replace('"', '', 1)
+
+    for row in rows:
+        if row["expression"] is None:
+            continue
+        try:
+            row["result"] = safe_eval(row["expression"], allow_math=True)
+        except (ExpressionError, ZeroDivisionError) as e:
+            row["error"] = str(e)
+    return rows
+
+
 # -------------------------
 # Build LangChain Ollama LLM and prompts
 # -------------------------
-def build_llm(model: str = "phi3", temperature: float = 0.0):
+DEFAULT_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+
+@st.cache_resource(show_spinner=False)
+def build_llm(model: str = "phi3", temperature: float = 0.0, base_url: str = DEFAULT_BASE_URL):
     """
     Create an Ollama LLM instance via LangChain.
     The model name depends on your Ollama local/models setup.
+    Cached per (model, temperature, base_url), so reruns reuse the same client.
     """
-    return Ollama(model=model, temperature=temperature)
+    return Ollama(model=model, temperature=temperature, base_url=base_url)
 
 
 CONVERT_PROMPT = PromptTemplate(
@@ -94,6 +155,13 @@ EXPLAIN_PROMPT = PromptTemplate(
 )
 
 
+@st.cache_resource(show_spinner=False)
+def build_chains(model: str, temperature: float, base_url: str):
+    """Return (llm, convert_chain, explain_chain), built once per (model, temperature, base_url)."""
+    llm = build_llm(model=model, temperature=temperature, base_url=base_url)
+    return llm, LLMChain(llm=llm, prompt=CONVERT_PROMPT), LLMChain(llm=llm, prompt=EXPLAIN_PROMPT)
+
+
 # -------------------------
 # Streamlit UI
 # -------------------------
@@ -102,6 +170,11 @@ st.title("Calculator (LangChain + Ollama)")
 
 with st.sidebar:
     st.header("Model settings")
+    base_url = st.text_input(
+        "Ollama base URL",
+        value=DEFAULT_BASE_URL,
+        placeholder="http://localhost:11434",
+    )
     model_name = st.text_input(
         "Ollama model name",
         value="phi3",
@@ -111,51 +184,92 @@ with st.sidebar:
     use_llm_for_explanation = st.checkbox(
         "Ask LLM for explanation", value=False, help="Get a short LLM explanation of the steps"
     )
+    batch_concurrency = st.number_input(
+        "Batch concurrency", min_value=1, max_value=32, value=4, step=1,
+        help="Max LLM conversions in flight at once in batch mode",
+    )
     st.markdown("Make sure your Ollama daemon is running locally and models exist.")
 
-st.markdown("Enter a calculation in natural language or as a simple arithmetic expression.")
-user_input = st.text_area(
-    "Calculation",
-    value="(3 + 5) * 2 - sqrt(16)  # note: converter will replace functions with numbers",
-)
+single_tab, batch_tab = st.tabs(["Single", "Batch"])
 
-col1, col2 = st.columns([1, 1])
+with batch_tab:
+    st.markdown("One request per line, or upload a CSV with one request per row.")
+    pasted = st.text_area("Requests", value="(3 + 5) * 2\n2^10\nsquare root of 81 plus 4", key="batch_requests")
+    uploaded = st.file_uploader("CSV file", type=["csv"])
+    column = None
+    if uploaded is not None:
+        has_header = st.checkbox("First row is a header", value=True)
+        # without a header every row is a request and columns are numbered from 0
+        frame = pd.read_csv(uploaded, header=0 if has_header else None)
+        column = st.selectbox(
+            "Column with the requests", list(frame.columns),
+            format_func=lambda c: str(c) if has_header else f"Column {c + 1}",
+        )
 
-with col1:
-    if st.button("Compute"):
-        if not user_input.strip():
-            st.warning("Please enter a calculation.")
+    if st.button("Compute all"):
+        if uploaded is not None:
+            batch_requests = [str(v).strip() for v in frame[column].dropna()]
+        else:
+            batch_requests = [line.strip() for line in pasted.splitlines()]
+        batch_requests = [r for r in batch_requests if r]
+        if not batch_requests:
+            st.warning("Please enter at least one calculation.")
         else:
-            llm = build_llm(model=model_name, temperature=temperature)
-            convert_chain = LLMChain(llm=llm, prompt=CONVERT_PROMPT)
-
-            try:
-                raw = convert_chain.invoke(user_input)
-            except Exception as e:
-                st.error(f"LLM conversion failed: {e}")
-                raw = ""
-
-            expr = extract_expression(raw) if raw else user_input.strip()
-            # remove only the first double-quote character, if present
-            expr = expr.replace('"', '', 1)
-            st.subheader("Extracted expression (only numbers & operators allowed)")
-            st.code(expr, language="python")
-            # llmmathchain is not supported in ollama phi3 or others
-            # math_chain = LLMMathChain.from_llm(llm=llm, verbose=True)
-            try:
-                result = eval(expr)
-                st.subheader("Result")
-                st.success(result)
-            except Exception as e:
-                st.error(f"Math chain evaluation failed: {e}")
-                result = None
-
-            # Ask LLM to explain steps if requested and if evaluation succeeded
-            if use_llm_for_explanation and result is not None:
-                explain_chain = LLMChain(llm=llm, prompt=EXPLAIN_PROMPT)
+            _, convert_chain, _ = build_chains(model_name, temperature, base_url)
+            results = pd.DataFrame(solve_batch(batch_requests, convert_chain, int(batch_concurrency)))
+            local = int((results["source"] == "local").sum())
+            st.caption(f"{len(results)} requests: {local} evaluated locally, {len(results) - local} converted by the LLM.")
+            st.dataframe(results, use_container_width=True)
+            buffer = io.StringIO()
+            results.to_csv(buffer, index=False)
+            st.download_button("Download results (CSV)", buffer.getvalue(), "calculator_results.csv", "text/csv")
+
+with single_tab:
+    st.markdown("Enter a calculation in natural language or as a simple arithmetic expression.")
+    user_input = st.text_area(
+        "Calculation",
+        value="(3 + 5) * 2 - sqrt(16)  # plain arithmetic is evaluated locally; anything else goes to the LLM",
+    )
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        if st.button("Compute"):
+            if not user_input.strip():
+                st.warning("Please enter a calculation.")
+            else:
+                llm, convert_chain, explain_chain = build_chains(model_name, temperature, base_url)
+                # fast path: input that already is arithmetic skips the LLM round-trip
+                expr = local_expression(user_input)
+                if expr is not None:
+                    st.caption("Plain arithmetic: evaluated locally, no LLM call.")
+                else:
+                    try:
+                        raw = convert_chain.invoke(user_input)
+                    except Exception as e:
+                        st.error(f"LLM conversion failed: {e}")
+                        raw = ""
+
+                    expr = extract_expression(raw) if raw else user_input.strip()
+                    # remove only the first double-quote character, if present
+                    expr = expr.replace('"', '', 1)
+                st.subheader("Extracted expression (only numbers & operators allowed)")
+                st.code(expr, language="python")
+                # llmmathchain is not supported in ollama phi3 or others
+                # math_chain = LLMMathChain.from_llm(llm=llm, verbose=True)
                 try:
-                    explanation = explain_chain.run(expr=expr, result=result)
-                    st.subheader("Explanation")
-                    st.write(explanation)
+                    result = safe_eval(expr, allow_math=True)
+                    st.subheader("Result")
+                    st.success(result)
                 except Exception as e:
-                    st.warning(f"LLM explanation failed: {e}")
+                    st.error(f"Math chain evaluation failed: {e}")
+                    result = None
+
+                # Ask LLM to explain steps if requested and if evaluation succeeded
+                if use_llm_for_explanation and result is not None:
+                    try:
+                        explanation = explain_chain.run(expr=expr, result=result)
+                        st.subheader("Explanation")
+                        st.write(explanation)
+                    except Exception as e:
+                        st.warning(f"LLM explanation failed: {e}")
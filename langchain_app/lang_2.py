@@ -1,4 +1,5 @@
 import os
+
 import streamlit as st
 
 # Use the LangChain Ollama wrapper
@@ -6,6 +7,8 @@ import streamlit as st
 # Also make sure Ollama daemon is running and the phi3 model is available locally.
 from langchain_community.llms import Ollama
 
+from common.history_window import TokenWindow
+
 st.set_page_config(page_title="LangChain + Ollama (phi3)", layout="wide")
 st.title("LangChain + Ollama — phi3 Chat Example")
 
@@ -20,6 +23,14 @@ with st.sidebar:
     model_name = st.text_input("Ollama model name", value="phi3")
     temperature = st.slider("Temperature", 0.0, 1.0, 0.2, 0.05)
     max_tokens = st.number_input("Max tokens", min_value=32, max_value=4096, value=1024, step=32)
+    history_budget = st.number_input(
+        "History token budget",
+        min_value=64,
+        max_value=8192,
+        value=1024,
+        step=64,
+        help="Only the most recent turns that fit this many (estimated) tokens are sent to the model",
+    )
     load = st.button("Connect / Reload Ollama")
 
 # -- Session state initialization --
@@ -27,6 +38,10 @@ if "llm" not in st.session_state:
     st.session_state.llm = None
 if "history" not in st.session_state:
     st.session_state.history = []
+# Prompt-side history: rendered turns with a running token count, trimmed to the budget
+if "history_window" not in st.session_state:
+    st.session_state.history_window = TokenWindow(max_tokens=int(history_budget))
+st.session_state.history_window.set_budget(int(history_budget))
 
 # -- Connect to Ollama when requested --
 if load:
@@ -60,13 +75,12 @@ with st.form("user_input_form", clear_on_submit=True):
 
 if clear:
     st.session_state.history = []
+    st.session_state.history_window.clear()
     st.stop()
 
 if submit and user_input:
-    # Build a simple conversational prompt that includes prior turns
-    history_text = ""
-    for turn in st.session_state.history:
-        history_text += f"User: {turn['user']}\nAssistant: {turn['assistant']}\n"
+    # Build a simple conversational prompt that includes the prior turns that fit the history budget
+    history_text = "".join(st.session_state.history_window)
     prompt = f"You are a helpful assistant.\n\n{history_text}User: {user_input}\nAssistant:"
 
     try:
@@ -113,8 +127,9 @@ if submit and user_input:
         else:
             reply = f"[Error calling Ollama model: {e}]"
 
-    # Save to history
+    # Save to history (full transcript for display, windowed copy for the prompt)
     st.session_state.history.append({"user": user_input, "assistant": reply})
+    st.session_state.history_window.append(f"User: {user_input}\nAssistant: {reply}\n")
 
 # Display chat history
 for turn in st.session_state.history:
@@ -0,0 +1,130 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Optional
+
+from langchain_classic.memory import ConversationSummaryBufferMemory
+from langchain_core.language_models.llms import LLM
+from pydantic import PrivateAttr
+
+# What it does
+"""
+✔ Same as ConversationSummaryBufferMemory (summary + recent messages)
+✔ Summary compaction runs in a background thread, not before the answer
+"""
+# Why
+"""
+ConversationSummaryBufferMemory calls the LLM to re-summarize inline, as soon as
+max_token_limit is exceeded. The user waits for that summary call, and it happens
+exactly on the turns where the conversation is already long.
+Here the prompt is built from the current buffer plus the last finished summary.
+The pruned messages stay in the buffer until the new summary is ready. Then both
+are swapped in at once, under a lock.
+"""
+
+
+class BackgroundSummaryBufferMemory(ConversationSummaryBufferMemory):
+    _executor: ThreadPoolExecutor = PrivateAttr(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+    )
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _pending: Optional[Future] = PrivateAttr(default=None)
+
+    def load_memory_variables(self, inputs):
+        # snapshot under the lock so a swap never shows half-compacted state
+        with self._lock:
+            variables = super().load_memory_variables(inputs)
+            if isinstance(variables[self.memory_key], list):
+                variables[self.memory_key] = list(variables[self.memory_key])
+            return variables
+
+    async def aload_memory_variables(self, inputs):
+        return self.load_memory_variables(inputs)
+
+    def prune(self):
+        """Schedule compaction if the buffer is over the limit; never blocks on the LLM."""
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                # one compaction at a time; the next turn re-checks the limit
+                return
+            buffer = list(self.chat_memory.messages)
+            summary = self.moving_summary_buffer
+
+        curr_buffer_length = self.llm.get_num_tokens_from_messages(buffer)
+        if curr_buffer_length <= self.max_token_limit:
+            return
+        n_pruned = 0
+        while curr_buffer_length > self.max_token_limit:
+            n_pruned += 1
+            curr_buffer_length = self.llm.get_num_tokens_from_messages(buffer[n_pruned:])
+        self._pending = self._executor.submit(self._compact, buffer[:n_pruned], summary)
+
+    async def aprune(self):
+        self.prune()
+
+    def _compact(self, pruned, summary):
+        new_summary = self.predict_new_summary(pruned, summary)
+        with self._lock:
+            messages = self.chat_memory.messages
+            # messages are only ever appended, so the pruned ones are still at the front
+            # (unless the memory was cleared meanwhile, in which case the result is dropped)
+            if len(messages) >= len(pruned) and all(a is b for a, b in zip(messages, pruned)):
+                del messages[:len(pruned)]
+                self.moving_summary_buffer = new_summary
+
+    def wait_for_summary(self, timeout: Optional[float] = None):
+        """Block until any in-flight compaction has finished (useful on shutdown and in tests)."""
+        pending = self._pending
+        if pending is not None:
+            pending.result(timeout)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+
+if __name__ == "__main__":
+    # Self-check with a fake LLM that records call order: the answer of the turn after the
+    # limit is exceeded must be produced before the slow background summary finishes.
+    from langchain_classic.chains import ConversationChain
+    from langchain_core.prompts import PromptTemplate
+
+    calls = []
+
+    class RecordingLLM(LLM):
+        summary_delay: float = 0.5
+
+        @property
+        def _llm_type(self):
+            return "recording-fake"
+
+        def get_num_tokens(self, text):
+            return len(text.split())
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            if "Progressively summarize" in prompt:
+                calls.append("summary-start")
+                time.sleep(self.summary_delay)
+                calls.append("summary-done")
+                return "The human introduced themselves and asked questions."
+            calls.append("answer")
+            return "Sure, here is a short answer."
+
+    llm = RecordingLLM()
+    memory = BackgroundSummaryBufferMemory(memory_key="chat_history", llm=llm, max_token_limit=20)
+    prompt = PromptTemplate(
+        input_variables=["chat_history", "input"],
+        template="The conversation so far:\n{chat_history}\nUser: {input}\nAssistant:",
+    )
+    chain = ConversationChain(llm=llm, memory=memory, prompt=prompt)
+
+    for question in ["Hi, my name is Romil.", "I live in Noida and work as an engineer.", "What do I do?"]:
+        start = time.perf_counter()
+        chain.invoke(question)
+        print(f"turn answered in {time.perf_counter() - start:.3f}s")
+
+    memory.wait_for_summary()
+    print("call order:", calls)
+    assert calls.index("answer", calls.index("summary-start")) < calls.index("summary-done"), calls
+    print("summary:", memory.moving_summary_buffer)
+    print("buffer after swap:", memory.chat_memory.messages)
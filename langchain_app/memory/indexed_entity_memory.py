@@ -0,0 +1,156 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from langchain_classic.memory import ConversationEntityMemory
+from langchain_classic.memory.chat_memory import BaseChatMemory
+from langchain_classic.memory.entity import BaseEntityStore
+from langchain_classic.memory.utils import get_prompt_input_key
+from langchain_core.messages import get_buffer_string
+from langchain_core.output_parsers import StrOutputParser
+from pydantic import Field, PrivateAttr
+
+# What it does
+"""
+✔ Same idea as ConversationEntityMemory: facts about people, places, things
+✔ Entities are looked up through an index, not extracted by the LLM on every turn
+✔ Extraction + summarization runs every N turns, optionally in a background thread
+"""
+# Why
+"""
+ConversationEntityMemory makes two or more LLM calls per message: it extracts entities
+before the answer, then re-summarizes each one afterwards. Here the prompt only needs an
+index hit on the known entity names that occur in the user's input. The LLM work is
+batched over the last N turns.
+"""
+
+
+class IndexedEntityStore(BaseEntityStore):
+    """Entity summaries plus an inverted index: entity -> turns it was mentioned in."""
+
+    store: dict[str, Optional[str]] = Field(default_factory=dict)
+    turns: dict[str, list[int]] = Field(default_factory=dict)
+    # first word of each entity name (lowercased) -> entity names starting with it
+    _by_word: dict[str, list[str]] = PrivateAttr(default_factory=dict)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.store.get(key, default)
+
+    def set(self, key: str, value: Optional[str]) -> None:
+        if key not in self.store:
+            words = re.findall(r"\w+", key.lower())
+            if words:
+                self._by_word.setdefault(words[0], []).append(key)
+        self.store[key] = value
+
+    def delete(self, key: str) -> None:
+        del self.store[key]
+        self.turns.pop(key, None)
+        for names in self._by_word.values():
+            if key in names:
+                names.remove(key)
+
+    def exists(self, key: str) -> bool:
+        return key in self.store
+
+    def clear(self) -> None:
+        self.store.clear()
+        self.turns.clear()
+        self._by_word.clear()
+
+    def link(self, entity: str, turn_id: int) -> None:
+        self.turns.setdefault(entity, []).append(turn_id)
+
+    def lookup(self, text: str) -> list[str]:
+        """Known entities mentioned in text: one dict hit per word, no scan over all entities."""
+        lowered = text.lower()
+        found = []
+        for word in re.findall(r"\w+", lowered):
+            for name in self._by_word.get(word, ()):
+                if name not in found and name.lower() in lowered:
+                    found.append(name)
+        return found
+
+
+class IndexedEntityMemory(ConversationEntityMemory):
+    entity_store: BaseEntityStore = Field(default_factory=IndexedEntityStore)
+    # run entity extraction + summarization once every N turns
+    extract_every_n_turns: int = 3
+    # run it on a background thread instead of inside save_context
+    background: bool = False
+
+    _turn: int = PrivateAttr(default=0)
+    _pending: list = PrivateAttr(default_factory=list)  # (turn id, turn text) not yet extracted
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _executor: ThreadPoolExecutor = PrivateAttr(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="entities")
+    )
+
+    def _input_key(self, inputs: dict[str, Any]) -> str:
+        return self.input_key or get_prompt_input_key(inputs, self.memory_variables)
+
+    def load_memory_variables(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        text = inputs[self._input_key(inputs)]
+        with self._lock:
+            if isinstance(self.entity_store, IndexedEntityStore):
+                entities = self.entity_store.lookup(text)
+            else:
+                entities = [name for name in self.entity_cache if self.entity_store.exists(name)]
+            entity_summaries = {name: self.entity_store.get(name, "") for name in entities}
+        self.entity_cache = entities
+
+        recent = self.buffer[-self.k * 2:]
+        if self.return_messages:
+            buffer: Any = recent
+        else:
+            buffer = get_buffer_string(recent, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        return {self.chat_history_key: buffer, "entities": entity_summaries}
+
+    def save_context(self, inputs: dict[str, Any], outputs: dict[str, str]) -> None:
+        # skip ConversationEntityMemory.save_context: it re-summarizes entities on every turn
+        BaseChatMemory.save_context(self, inputs, outputs)
+        self._turn += 1
+        output_text = next(iter(outputs.values()), "") if outputs else ""
+        self._pending.append((self._turn, f"{inputs[self._input_key(inputs)]}\n{output_text}"))
+        if len(self._pending) >= self.extract_every_n_turns:
+            self.flush(wait=not self.background)
+
+    def flush(self, wait: bool = True) -> None:
+        """Extract entities from all pending turns now."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        history = get_buffer_string(
+            self.buffer[-(len(batch) + self.k) * 2:], human_prefix=self.human_prefix, ai_prefix=self.ai_prefix
+        )
+        future = self._executor.submit(self._extract, batch, history)
+        if wait:
+            future.result()
+
+    def _extract(self, batch: list, history: str) -> None:
+        batch_text = "\n".join(text for _, text in batch)
+        extraction = self.entity_extraction_prompt | self.llm | StrOutputParser()
+        output = extraction.invoke({"history": history, "input": batch_text}).strip()
+        entities = [] if output == "NONE" else [w.strip() for w in output.split(",") if w.strip()]
+
+        summarization = self.entity_summarization_prompt | self.llm | StrOutputParser()
+        for entity in entities:
+            summary = summarization.invoke({
+                "summary": self.entity_store.get(entity, ""),
+                "entity": entity,
+                "history": history,
+                "input": batch_text,
+            })
+            with self._lock:
+                self.entity_store.set(entity, summary.strip())
+                if isinstance(self.entity_store, IndexedEntityStore):
+                    mentioned = [turn_id for turn_id, text in batch if entity.lower() in text.lower()]
+                    for turn_id in mentioned or [turn_id for turn_id, _ in batch]:
+                        self.entity_store.link(entity, turn_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._pending = []
+            self._turn = 0
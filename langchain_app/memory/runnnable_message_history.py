@@ -8,6 +8,7 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.messages import AIMessage, HumanMessage
+from sqlite_chat_history import SQLiteChatMessageHistory
 
 LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "false").lower() == "true"
 LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT", "")
@@ -16,25 +17,14 @@ LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "first_project")
 
 llm = ChatOllama(model="phi3:mini", temperature=0, num_ctx=1024)
 
-# create an in-memory chat history
-class SimpleChatMessageHistory(BaseChatMessageHistory):
-    def __init__(self):
-        self.messages = []
+CHAT_HISTORY_DB = os.getenv("CHAT_HISTORY_DB", "chat_history.db")
 
-    def add_message(self, message):
-        self.messages.append(message)
-
-    def get_messages(self):
-        return self.messages
-
-    def clear(self):
-        self.messages = []
-
-# session based history
+# session based history, persisted in an append-only SQLite log so sessions survive restarts
+# (the dict only caches the history objects; each one loads its last messages lazily, once)
 session_store = {}
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
     if session_id not in session_store:
-        session_store[session_id] = SimpleChatMessageHistory()
+        session_store[session_id] = SQLiteChatMessageHistory(session_id, db_path=CHAT_HISTORY_DB, max_messages=50)
     return session_store[session_id]
 
 # create prompt
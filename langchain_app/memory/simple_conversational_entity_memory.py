@@ -1,7 +1,7 @@
 from langchain_community.llms.ollama import Ollama
 from langchain_classic.chains import ConversationChain
-from langchain_classic.memory import ConversationEntityMemory
 from langchain_core.prompts import PromptTemplate
+from indexed_entity_memory import IndexedEntityMemory
 
 llm = Ollama(
     model="phi3",
@@ -16,13 +16,15 @@ llm = Ollama(
 # - personal assistant applications
 
 # memory
-memory = ConversationEntityMemory(
+# entities are looked up through an index; extraction runs every 2 turns in a background thread
+memory = IndexedEntityMemory(
     llm=llm,
-    max_token_limit=1024
+    extract_every_n_turns=2,
+    background=True,
 )
 
 # template
-# ConversationEntityMemory provides 'history' and 'entities' keys, so the prompt must accept them.
+# IndexedEntityMemory (like ConversationEntityMemory) provides 'history' and 'entities' keys, so the prompt must accept them.
 template = """You are a helpful assistant, give answer in one sentence. The conversation so far:
 {history}
 Known entities: {entities}
@@ -1,7 +1,7 @@
 from langchain_community.llms.ollama import Ollama
 from langchain_classic.chains import ConversationChain
-from langchain_classic.memory import ConversationSummaryBufferMemory
 from langchain_core.prompts import PromptTemplate
+from background_summary_buffer_memory import BackgroundSummaryBufferMemory
 
 llm = Ollama(
     model="phi3",
@@ -9,7 +9,8 @@ llm = Ollama(
 )
 
 # memory with custom key
-memory = ConversationSummaryBufferMemory(
+# summary compaction runs in the background, so long conversations don't wait on the summary call
+memory = BackgroundSummaryBufferMemory(
     memory_key="chat_history",
     llm=llm,
     max_token_limit=1024
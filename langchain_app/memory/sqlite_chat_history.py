@@ -0,0 +1,101 @@
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+# What it stores
+"""
+✔ Every message, in an append-only SQLite log (WAL mode), one row per message
+✔ Survives restarts: a resumed session picks up where it left off
+"""
+# How it stays fast
+"""
+- connections are reused from a small pool instead of opened per call
+- one transaction per add_messages call (a full human + AI turn is one write)
+- only the last `max_messages` messages of a session are loaded, once, on first access;
+  after that the in-memory copy is updated on write, so a turn never re-reads the log
+"""
+
+
+class SQLiteConnectionPool:
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self._pool = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS message_log ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL,"
+                " message TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_message_log_session ON message_log (session_id, id)")
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            with conn:  # commits on success, rolls back on error
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> SQLiteConnectionPool:
+    """One pool per database file, shared by every history in the process."""
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = SQLiteConnectionPool(db_path)
+        return _pools[db_path]
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    def __init__(self, session_id: str, db_path: str = "chat_history.db", max_messages: int = 50,
+                 pool: Optional[SQLiteConnectionPool] = None):
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self.pool = pool or get_pool(db_path)
+        self._messages = None  # loaded lazily
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        if self._messages is None:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    "SELECT message FROM message_log WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (self.session_id, self.max_messages),
+                ).fetchall()
+            self._messages = messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+        return self._messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        messages = list(messages)
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO message_log (session_id, message) VALUES (?, ?)",
+                [(self.session_id, json.dumps(message_to_dict(m))) for m in messages],
+            )
+        if self._messages is not None:
+            self._messages.extend(messages)
+            del self._messages[:-self.max_messages]
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.add_messages([message])
+
+    def clear(self) -> None:
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM message_log WHERE session_id = ?", (self.session_id,))
+        self._messages = []
@@ -1,13 +1,18 @@
+import hashlib
+import os
+
 import streamlit as st
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OllamaEmbeddings
-from chromadb import Client
+import chromadb
 from chromadb.config import Settings
 from langchain_community.llms import Ollama
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
 from langchain_classic.chains import RetrievalQA
 
+from common.embedding_cache import CachedEmbeddings
+from common.ingest import content_id, ingest_stream, iter_texts
+
 # simple_lang_rag.py (adapted to the imports at top)
 # Requirements (examples):
 #   pip install streamlit langchain chromadb ollama langchain_text_splitters
@@ -17,8 +22,27 @@ from langchain_classic.chains import RetrievalQA
 st.set_page_config(page_title="Ollama + LangChain RAG (chromadb)", layout="wide")
 
 # --- Helpers ----
-def get_llm():
-    return Ollama(model="phi3", base_url="http://localhost:11434", verbose=False)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm(model="phi3", temperature=None, base_url=OLLAMA_BASE_URL):
+    # one client per (model, temperature, base_url), shared across reruns and sessions
+    return Ollama(model=model, temperature=temperature, base_url=base_url, verbose=False)
+
+@st.cache_resource(show_spinner=False)
+def get_chroma_client(persist_directory="./chromadb_store"):
+    return chromadb.PersistentClient(path=persist_directory, settings=Settings(anonymized_telemetry=False))
+
+
+def ingest_fingerprint(text, chunk_size, chunk_overlap, embedding_model_name):
+    """sha256 over everything that determines the stored vectors."""
+    h = hashlib.sha256()
+    for part in (text, str(chunk_size), str(chunk_overlap), embedding_model_name):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
 
 def create_retriever_from_text(
     text,
@@ -29,62 +53,47 @@ def create_retriever_from_text(
     persist_directory="./chromadb_store",
     collection_name="langchain_demo",
 ):
-    # default to OllamaEmbeddings (imported at top)
+    # default to OllamaEmbeddings (imported at top), cached so re-ingesting the same text is free
     if embeddings_model is None:
-        embeddings_model = OllamaEmbeddings(model="phi3")
+        embeddings_model = CachedEmbeddings(OllamaEmbeddings(model="phi3"))
 
     splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    chunks = splitter.split_text(text)
-    if not chunks:
-        raise ValueError("No text chunks to index.")
-
-    docs = [Document(page_content=c) for c in chunks]
-    
-    # prefer to pass client settings to Chroma; fall back to alternate constructors for compatibility
-    try:
-        client_settings = Settings(
-            chroma_db_impl="duckdb+parquet",
-            persist_directory=persist_directory,
-            anonymized_telemetry=False,
-        )
-        chroma = Chroma.from_documents(
-            documents=docs,
-            embedding=embeddings_model,
-            collection_name=collection_name,
-            client_settings=client_settings,
+
+    # the collection records the fingerprint of what it holds: the same input reopens it as is,
+    # changed input upserts only the chunks it lacks (ids are content hashes) and drops stale ones
+    model_name = getattr(embeddings_model, "model_name", None) or getattr(embeddings_model, "model", None) \
+        or type(embeddings_model).__name__
+    fp = ingest_fingerprint(text, chunk_size, chunk_overlap, model_name)
+    client = get_chroma_client(persist_directory)
+    chroma = Chroma(client=client, collection_name=collection_name, embedding_function=embeddings_model)
+    metadata = chroma._collection.metadata or {}
+
+    if metadata.get("fingerprint") != fp or chroma._collection.count() != metadata.get("chunk_count"):
+        if metadata.get("embedding_model") not in (None, model_name):
+            # vectors from another model cannot be reused
+            chroma.delete_collection()
+            chroma = Chroma(client=client, collection_name=collection_name, embedding_function=embeddings_model)
+
+        wanted = set()
+
+        def chunk_id(source, index, chunk):
+            wanted.add(content_id(source, index, chunk))
+            return content_id(source, index, chunk)
+
+        stats = ingest_stream(chroma, iter_texts([text]), embeddings_model, splitter, id_fn=chunk_id,
+                              skip_existing=True)
+        if not stats["received_chunks"]:
+            raise ValueError("No text chunks to index.")
+        stale = [i for i in chroma._collection.get(include=[])["ids"] if i not in wanted]
+        if stale:
+            chroma._collection.delete(ids=stale)
+        chroma._collection.modify(
+            metadata={"fingerprint": fp, "chunk_count": len(wanted), "embedding_model": model_name}
         )
-    except Exception:
-        # fallback: try from_documents with persist_directory param
-        try:
-            chroma = Chroma.from_documents(
-                documents=docs,
-                embedding=embeddings_model,
-                collection_name=collection_name,
-                persist_directory=persist_directory,
-            )
-        except Exception:
-            # final fallback: create chromadb client manually and then Chroma
-            try:
-                client = Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=persist_directory))
-            except Exception:
-                client = Client()
-            # Chroma may accept a chromadb client directly depending on version
-            chroma = Chroma.from_documents(
-                documents=docs,
-                embedding=embeddings_model,
-                collection_name=collection_name,
-                client=client,
-            )
 
     # create retriever with desired k
     retriever = chroma.as_retriever(search_kwargs={"k": k})
-    # return retriever and the chroma vectorstore (and optionally the client if available)
-    client_obj = None
-    try:
-        client_obj = getattr(chroma, "_client", None) or getattr(chroma, "client", None)
-    except Exception:
-        client_obj = None
-    return retriever, chroma, client_obj
+    return retriever, chroma, client
 
 # --- UI ----
 st.title("Simple RAG with Ollama + LangChain (chromadb)")
@@ -114,6 +123,8 @@ with col1:
                 st.session_state["retriever"] = retriever
                 st.session_state["chroma_store"] = chroma_store
                 st.session_state["chromadb_client"] = client
+                # the QA chain is bound to the retriever; rebuild it on next Ask
+                st.session_state.pop("qa_chain", None)
                 st.success("Ingested paragraph into chromadb-backed Chroma vector store.")
 
 with col2:
@@ -136,12 +147,16 @@ if st.button("Ask") and query.strip():
         if llm:
             with st.spinner("Retrieving context and generating answer..."):
                 try:
-                    qa = RetrievalQA.from_chain_type(
-                        llm=llm,
-                        chain_type="stuff",
-                        retriever=st.session_state["retriever"],
-                        return_source_documents=True,
-                    )
+                    # built once per ingested store and kept next to the retriever
+                    qa = st.session_state.get("qa_chain")
+                    if qa is None:
+                        qa = RetrievalQA.from_chain_type(
+                            llm=llm,
+                            chain_type="stuff",
+                            retriever=st.session_state["retriever"],
+                            return_source_documents=True,
+                        )
+                        st.session_state["qa_chain"] = qa
                     result = qa({"query": query})
                     answer = result.get("result") or result.get("output_text") or ""
                     sources = result.get("source_documents") or []
@@ -157,7 +172,7 @@ if st.button("Ask") and query.strip():
 
 # Optional: small UI to clear session (for re-ingest)
 if st.button("Clear ingested data"):
-    for key in ["retriever", "chroma_store", "chromadb_client"]:
+    for key in ["retriever", "chroma_store", "chromadb_client", "qa_chain"]:
         if key in st.session_state:
             del st.session_state[key]
     st.stop()
@@ -1,14 +1,20 @@
+import sys
+
 from langchain_community.llms import Ollama
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Chroma
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
 
-from chromadb import Client
+import chromadb
 from chromadb.config import Settings
 
+from common.embedding_cache import CachedEmbeddings
+from common.ingest import ingest_stream, iter_text_files, iter_texts
+
 # -------- 1. Sample Knowledge (Very Small) --------
+# pass files or directories to index those instead (read lazily, resumable):
+#   python simple_rag_pipeline.py ./docs
 texts = [
     "SIP stands for Systematic Investment Plan. It helps people invest small amounts regularly.",
     "Mutual funds pool money from many investors and invest in stocks or bonds.",
@@ -16,25 +22,33 @@ texts = [
     "Romil is working as a software engineer in LTI Mindtree organization."
 ]
 
-documents = [Document(page_content=text) for text in texts]
+paths = sys.argv[1:]
+sources = iter_text_files(paths) if paths else iter_texts(texts)
 
-# -------- 2. Split Text --------
+# -------- 2. Splitter (applied as the sources stream in) --------
 splitter = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=20)
-chunks = splitter.split_documents(documents)
 
-# -------- 3. Create Chroma Client --------
-client = Client(Settings(persist_directory="./chroma_db", anonymized_telemetry=False))
+# -------- 3. Create Chroma Client (persistent, so the ingest checkpoint matches what is stored) --------
+client = chromadb.PersistentClient(path="./chroma_db", settings=Settings(anonymized_telemetry=False))
 
-# -------- 4. Embeddings --------
-embedding_model = OllamaEmbeddings(model="nomic-embed-text")
+# -------- 4. Embeddings (cached on disk, unchanged chunks are not re-embedded) --------
+embedding_model = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
 
-# -------- 5. Create Vector Store --------
-vector_store = Chroma.from_documents(
-    documents=chunks,
-    embedding=embedding_model,
-    collection_name="simple_rag_collection",
+# -------- 5. Create Vector Store and stream the chunks into it --------
+vector_store = Chroma(
     client=client,
+    collection_name="simple_rag_collection",
+    embedding_function=embedding_model,
+)
+stats = ingest_stream(
+    vector_store,
+    sources,
+    embedding_model,
+    splitter,
+    checkpoint_path="simple_rag_ingest.checkpoint.json" if paths else None,
+    skip_existing=True,
 )
+print(f"Indexed: {stats}")
 
 # -------- 6. Load LLM (phi3) --------
 llm = Ollama(model="phi3", num_predict=100, temperature=0)
@@ -5,6 +5,8 @@ from langchain_community.chat_models import ChatOllama as Ollama
 from langchain_community.tools import Tool
 from langchain_classic.agents import initialize_agent, AgentType
 
+from common.safe_eval import ExpressionError, safe_eval
+
 load_dotenv()
 LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "false").lower() == "true"
 LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT", "")
@@ -27,7 +29,10 @@ weather_tool = Tool(
 
 def calculator_tool(query: str) -> str:
     """Tool that uses a calculator to answer questions."""
-    return {eval(query)}
+    try:
+        return str(safe_eval(query))
+    except (ExpressionError, ZeroDivisionError) as e:
+        return f"Could not evaluate {query!r}: {e}"
 
 cal_tool = Tool(
     name="Calculator",
@@ -7,6 +7,9 @@ from langchain_classic.schema import Document
 
 from dotenv import load_dotenv
 
+from common.embedding_cache import CachedEmbeddings
+from common.tool_cache import tool_cache
+
 load_dotenv()
 """
 User Question
@@ -22,7 +25,7 @@ Final Answer
 
 # create vector db andtools using a vector store
 llm = ChatOllama(model="phi3:mini", temperature=0, num_ctx=1024)
-embeddings = OllamaEmbeddings(model="phi3:mini")
+embeddings = CachedEmbeddings(OllamaEmbeddings(model="phi3:mini"))
 documents=[
         Document(page_content="LangChain is a framework for developing applications powered by language models.", metadata={"source": "langchain"}),
         Document(page_content="Ollama provides local LLMs that can be run on your machine.", metadata={"source": "ollama"}),
@@ -35,6 +38,8 @@ vectorstore = Chroma.from_documents(
 
 retriever = vectorstore.as_retriever(search_kwargs={"k": 1})
 
+# the agent tends to "search again to be sure": repeated queries are answered from cache
+@tool_cache(ttl_seconds=600, max_entries=256)
 def vectorstore_tool(query: str) -> str:
     """Tool that queries the vector store and returns relevant documents."""
     results = retriever.invoke(query)